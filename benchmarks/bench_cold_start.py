@@ -0,0 +1,73 @@
+"""
+Cold start of each app in a fresh interpreter: time to import the app module
+and time to the first response (GET / then POST /start-game), plus which heavy
+LLM/graph libraries were already loaded at import time.
+
+Runs offline: LLM calls go to the replay backend (non-strict, falling back to
+the local lexicon when nothing was recorded) and words come from the lexicon.
+
+Usage: python benchmarks/bench_cold_start.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+
+APPS = {
+    "d0": ("app", [root_dir / "d0_simple_langchain"]),
+    "d1": ("d1_chatbot.app", [root_dir / "d1_chatbot"]),
+    "d2": ("app2", [root_dir / "d2_multi_agent"]),
+}
+
+HEAVY_MODULES = ["openai", "httpx", "tiktoken", "langchain", "langchain_core", "langgraph", "pydantic"]
+
+PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+sys.path[:0] = {paths!r}
+module = importlib.import_module({module!r})
+imported = time.perf_counter()
+heavy = [name for name in {heavy!r} if name in sys.modules]
+client = module.app.test_client()
+client.get("/")
+client.post("/start-game", json={{}})
+responded = time.perf_counter()
+with open({result!r}, "w") as f:
+    json.dump({{"import": imported - started, "first_response": responded - started, "heavy": heavy}}, f)
+"""
+
+
+def probe(module, paths):
+    env = dict(os.environ,
+               LLM_MODE="replay", LLM_REPLAY_STRICT="0", WORD_SOURCE="lexicon",
+               OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "sk-benchmark"))
+    env.pop("GAME_DB", None)
+    # The result goes to a file of its own, so whatever the app prints can't get in the way
+    with tempfile.TemporaryDirectory() as tmp:
+        result = Path(tmp) / "result.json"
+        code = PROBE.format(paths=[str(root_dir)] + [str(p) for p in paths], module=module,
+                            heavy=HEAVY_MODULES, result=str(result))
+        subprocess.run([sys.executable, "-c", code], env=env, cwd=root_dir,
+                       capture_output=True, text=True, check=True)
+        return json.loads(result.read_text())
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"Cold start, median of {runs} fresh interpreters")
+    for name, (module, paths) in APPS.items():
+        try:
+            results = [probe(module, paths) for _ in range(runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"{name}: failed\n{e.stderr.strip().splitlines()[-1] if e.stderr.strip() else ''}")
+            continue
+        import_time = statistics.median(r["import"] for r in results)
+        first = statistics.median(r["first_response"] for r in results)
+        heavy = ", ".join(results[0]["heavy"]) or "none"
+        print(f"{name}: import {import_time * 1000:8.1f} ms  first response {first * 1000:8.1f} ms"
+              f"  loaded at import: {heavy}")
@@ -0,0 +1,77 @@
+"""
+Per-game setup cost in d2: building a client and compiling the graph for every
+new game (before) vs. starting a new thread on the shared compiled graph (after).
+
+The LLM is stubbed so only our own overhead is measured.
+
+Usage: python benchmarks/bench_d2_game_setup.py [games]
+"""
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+sys.path.insert(0, str(root_dir / "d2_multi_agent"))
+
+from langchain_core.messages import HumanMessage
+
+from common import llm as llm_backend
+from common.session_store import new_session_id
+
+
+class StubLLM:
+    """Answers instantly so the benchmark measures setup, not the model."""
+
+    def chat(self, messages, **params):
+        return "apple"
+
+
+def new_game_state(graph_module):
+    state = graph_module.init_game()
+    state["messages"].append(HumanMessage(content="Let's start the game!"))
+    return state
+
+
+def before(graph_module, games):
+    """Old behaviour: a new LLM client and a freshly compiled graph per game."""
+    timings = []
+    for _ in range(games):
+        started = time.perf_counter()
+        llm_backend.create_backend()
+        graph = graph_module.create_game_graph(llm=StubLLM())
+        graph.invoke(new_game_state(graph_module), {"configurable": {"thread_id": new_session_id()}})
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def after(graph_module, games):
+    """New behaviour: one shared compiled graph, one thread per game."""
+    graph = graph_module.create_game_graph(llm=StubLLM())
+    timings = []
+    for _ in range(games):
+        started = time.perf_counter()
+        graph.invoke(new_game_state(graph_module), {"configurable": {"thread_id": new_session_id()}})
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    print(f"{name:>7}: mean {statistics.mean(timings) * 1000:8.3f} ms"
+          f"  p50 {timings[len(timings) // 2] * 1000:8.3f} ms"
+          f"  p95 {timings[int(len(timings) * 0.95)] * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    # Client construction needs a key but never calls the API here
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    llm_backend.set_backend(StubLLM())
+    import game_graph as graph_module
+
+    print(f"Per-game setup over {games} games")
+    report("before", before(graph_module, games))
+    report("after", after(graph_module, games))
@@ -0,0 +1,77 @@
+"""
+Throughput of the SQLite session store with several worker processes sharing
+one WAL database, each updating its own games through the write-behind buffer
+(as sticky-routed web workers do), then reloading them from disk (read-through).
+
+Usage: python benchmarks/bench_persistence.py [workers] [games per worker] [guesses per game]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from common.persistence import SessionDB, pack
+
+
+def to_record(game):
+    return game
+
+
+def from_record(record):
+    return record
+
+
+def worker(path, worker_id, games, guesses, results):
+    db = SessionDB(path, to_record, from_record)
+    ids = [f"{worker_id}-{i}" for i in range(games)]
+
+    started = time.perf_counter()
+    for turn in range(guesses):
+        for sid in ids:
+            db.save(sid, ["apple", [f"guess{n}" for n in range(turn + 1)], True, turn + 1, 10])
+    db.flush()
+    write_time = time.perf_counter() - started
+
+    fresh = SessionDB(path, to_record, from_record)
+    started = time.perf_counter()
+    for sid in ids:
+        assert fresh.load(sid)[3] == guesses
+    read_time = time.perf_counter() - started
+
+    results.put((games * guesses, write_time, games, read_time, db.flushes))
+
+
+def main(workers, games, guesses):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "games.db")
+        SessionDB(path, to_record, from_record)  # create the schema up front
+
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=worker, args=(path, i, games, guesses, results))
+                 for i in range(workers)]
+        started = time.perf_counter()
+        for proc in procs:
+            proc.start()
+        stats = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        elapsed = time.perf_counter() - started
+
+        updates = sum(s[0] for s in stats)
+        loads = sum(s[2] for s in stats)
+        record = ["apple", [f"guess{n}" for n in range(guesses)], True, guesses, 10]
+        print(f"{workers} workers x {games} games x {guesses} guesses on one WAL database")
+        print(f"  updates: {updates} in {elapsed:.2f}s ({updates / elapsed:,.0f}/s overall), "
+              f"{sum(s[4] for s in stats)} batched flushes")
+        print(f"  read-through loads: {loads}, mean {sum(s[3] for s in stats) / loads * 1e6:.1f} us")
+        print(f"  final record size: {len(pack(record))} bytes")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [4, 500, 10][len(args):]))
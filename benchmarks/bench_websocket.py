@@ -0,0 +1,124 @@
+"""
+WebSocket connection density for one d0 worker: opens N game connections
+against a threaded server in this process, holds them open, and measures
+handshake time, round trip of a cheap action over a socket (reveal) while all
+N are open, and memory and threads per open connection. The same action over
+REST (one POST per action, as the page did before) is timed for comparison.
+
+Runs offline: LLM calls go to the replay backend (non-strict) and words come
+from the local lexicon. Needs flask-sock (server) and simple-websocket (client).
+
+Usage: python benchmarks/bench_websocket.py [connections] [rounds]
+"""
+import http.client
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+sys.path.insert(0, str(root_dir / "d0_simple_langchain"))
+
+os.environ.update(LLM_MODE="replay", LLM_REPLAY_STRICT="0", WORD_SOURCE="lexicon", WS_TOKEN_INTERVAL="0")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.pop("GAME_DB", None)
+
+import simple_websocket
+from werkzeug.serving import make_server
+
+from common.flask_ws import encode, socket_stats
+from common.session_store import new_session_id
+
+
+def rss_kb() -> int:
+    """Resident memory of this process in kB (Linux)."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summary(label, seconds):
+    ms = [s * 1000 for s in seconds]
+    print(f"{label:<28} median {statistics.median(ms):7.2f} ms   p95 {percentile(ms, 0.95):7.2f} ms")
+
+
+def serve(app):
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def open_connections(port, count):
+    clients, handshakes, failed = [], [], 0
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            client = simple_websocket.Client.connect(
+                f"ws://127.0.0.1:{port}/ws", headers={"X-Game-Id": new_session_id()})
+        except Exception:
+            failed += 1
+            continue
+        handshakes.append(time.perf_counter() - started)
+        clients.append(client)
+    return clients, handshakes, failed
+
+
+def socket_round_trips(clients, rounds):
+    timings = []
+    for i in range(rounds):
+        for client in clients:
+            started = time.perf_counter()
+            client.send(encode({"op": "reveal", "id": i}))
+            client.receive()
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def rest_round_trips(port, count):
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        conn.request("POST", "/reveal-word", headers={"X-Game-Id": new_session_id()})
+        conn.getresponse().read()
+        conn.close()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+if __name__ == "__main__":
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    import app as game_app
+    server = serve(game_app.app)
+    port = server.server_port
+
+    rss_before, threads_before = rss_kb(), threading.active_count()
+    clients, handshakes, failed = open_connections(port, connections)
+    # Let the server threads settle before sampling
+    time.sleep(0.5)
+    rss_after, threads_after = rss_kb(), threading.active_count()
+    opened = len(clients)
+
+    print(f"{opened} connections open ({failed} failed), server reports {socket_stats.stats()['open']}")
+    if opened:
+        print(f"per connection, both ends: memory {(rss_after - rss_before) / opened:6.1f} kB"
+              f"   threads {(threads_after - threads_before) / opened:.2f}")
+        summary("handshake", handshakes)
+        summary(f"socket round trip ({opened} open)", socket_round_trips(clients, rounds))
+    summary("REST round trip", rest_round_trips(port, max(opened, 1) * rounds))
+
+    for client in clients:
+        client.close()
+    server.shutdown()
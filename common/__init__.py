@@ -0,0 +1,3 @@
+"""
+Word Guessing Game - shared components used by the d0, d1 and d2 apps
+"""
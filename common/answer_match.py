@@ -0,0 +1,135 @@
+"""
+Local answer matching: accepts near-correct guesses without a model call.
+
+For each target word an accept set is computed once (at game start, then
+cached): the word and its plural/singular forms, plus its typo variants when
+the word's tolerance allows it. Guesses are normalized first (lowercased,
+leading article such as "an" dropped, non-letters removed), so "an apple",
+"Apples", "appel" and "aple" all match "apple" with a set lookup.
+
+A typo variant is two neighbouring letters swapped ("hrose"), a letter typed
+twice ("horsse") or one of a double letter dropped ("aple"). Replacing,
+inserting or dropping an arbitrary letter is not a typo variant, as that is
+how one real word turns into another ("house" for "horse", "hook" for "book").
+
+Tolerance (typos allowed) depends on the word's difficulty in the lexicon
+(ANSWER_TOLERANCE, default "easy:1,medium:1,hard:2") and is capped for short
+words. Variants that are themselves other lexicon words ("salt" for "slat")
+are never accepted.
+"""
+import os
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional
+
+from .lexicon import load_lexicon
+
+ARTICLES = ("a", "an", "the", "some")
+
+# Shortest word allowed one typo, and two typos
+ONE_EDIT_LENGTH = 4
+TWO_EDITS_LENGTH = 8
+
+_NON_LETTERS = re.compile(r"[^a-z]+")
+
+
+def parse_tolerances(spec: str) -> Dict[str, int]:
+    """Parse "easy:1,medium:1,hard:2" into {difficulty: max typos}."""
+    tolerances = {}
+    for part in spec.split(","):
+        if ":" in part:
+            difficulty, edits = part.split(":", 1)
+            tolerances[difficulty.strip()] = max(0, min(2, int(edits)))
+    return tolerances
+
+
+TOLERANCES = parse_tolerances(os.getenv("ANSWER_TOLERANCE", "easy:1,medium:1,hard:2"))
+
+
+def normalize(guess: str) -> str:
+    """Lowercase, drop a leading article and everything but letters."""
+    words = guess.lower().split()
+    if len(words) > 1 and words[0] in ARTICLES:
+        words = words[1:]
+    return _NON_LETTERS.sub("", "".join(words))
+
+
+def inflections(word: str) -> FrozenSet[str]:
+    """The word with its common plural and singular forms."""
+    forms = {word, word + "s", word + "es"}
+    if word.endswith("y") and len(word) > 2 and word[-2] not in "aeiou":
+        forms.add(word[:-1] + "ies")
+    if word.endswith("fe"):
+        forms.add(word[:-2] + "ves")
+    elif word.endswith("f"):
+        forms.add(word[:-1] + "ves")
+    if word.endswith("s") and len(word) > 3:
+        forms.add(word[:-1])
+        if word.endswith("ies"):
+            forms.add(word[:-3] + "y")
+        elif word.endswith("es"):
+            forms.add(word[:-2])
+    return frozenset(forms)
+
+
+def typos(word: str) -> FrozenSet[str]:
+    """Spellings one typo away: adjacent letters swapped, a letter doubled, or a double letter single."""
+    swaps = [word[:i] + word[i + 1] + word[i] + word[i + 2:] for i in range(len(word) - 1)
+             if word[i] != word[i + 1]]
+    doubled = [word[:i + 1] + word[i:] for i in range(len(word))]
+    singled = [word[:i] + word[i + 1:] for i in range(len(word) - 1) if word[i] == word[i + 1]]
+    return frozenset(swaps + doubled + singled)
+
+
+def word_difficulty(word: str) -> str:
+    """Difficulty of a word from the lexicon, "medium" if it isn't listed."""
+    lexicon = load_lexicon()
+    word_id = lexicon.find(word)
+    return lexicon.difficulty(word_id) if word_id is not None else "medium"
+
+
+def word_tolerance(word: str, difficulty: Optional[str] = None) -> int:
+    """Typos allowed for a word: by difficulty, capped by its length."""
+    tolerance = TOLERANCES.get(difficulty or word_difficulty(word), 1)
+    if len(word) < ONE_EDIT_LENGTH:
+        return 0
+    if len(word) < TWO_EDITS_LENGTH:
+        return min(tolerance, 1)
+    return tolerance
+
+
+class AnswerMatcher:
+    """The accept set of one target word."""
+
+    __slots__ = ("word", "tolerance", "forms", "accept")
+
+    def __init__(self, word: str, tolerance: int):
+        self.word = word
+        self.tolerance = tolerance
+        self.forms = inflections(word)
+        accept = set(self.forms)
+        variants = self.forms
+        for _ in range(tolerance):
+            variants = frozenset(typo for variant in variants for typo in typos(variant))
+            accept.update(variants)
+        if tolerance:
+            # A different real word is a wrong guess, however close
+            lexicon = load_lexicon()
+            accept = {variant for variant in accept
+                      if variant in self.forms or lexicon.find(variant) is None}
+        self.accept = frozenset(accept)
+
+    def matches(self, guess: str) -> bool:
+        return normalize(guess) in self.accept
+
+
+@lru_cache(maxsize=4096)
+def answer_matcher(word: str, difficulty: Optional[str] = None) -> AnswerMatcher:
+    """The (cached) matcher for a target word; call it at game start to precompute."""
+    word = word.lower()
+    return AnswerMatcher(word, word_tolerance(word, difficulty))
+
+
+def is_correct(word: str, guess: str) -> bool:
+    """Whether a guess counts as the target word."""
+    return answer_matcher(word).matches(guess)
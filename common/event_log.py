@@ -0,0 +1,223 @@
+"""
+Append-only log of game events, and a streaming reader for aggregates.
+
+Handlers call EventLog.record(), which only appends to an in-memory buffer; a
+background thread writes the buffer out in batches as line-delimited JSON
+(short keys, one event per line) to size-rotated segment files. A full buffer
+drops new events (counted in stats()) rather than block a request. Each process
+writes its own segments, so several workers can share one directory.
+
+Events, all with "t" (unix time), "e" (kind), "g" (game/session id) and "w" (word):
+  start                       a new game
+  guess   n (attempt), r      r is "win", "give_up", "limit" or "miss"
+  hint    n (attempt), s      s is where the hint came from ("cache", "model", "local", ...)
+
+The reader streams segments line by line, so memory stays bounded by the
+number of distinct words however large the logs are:
+
+    python -m common.event_log <log dir> [--top N] [--min-games N]
+"""
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".jsonl"
+
+# Outcomes of a guess that end the game
+WIN = "win"
+GIVE_UP = "give_up"
+LIMIT = "limit"
+MISS = "miss"
+
+
+class EventLog:
+    """Buffered writer of size-rotated event segments in ``directory``."""
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 flush_interval: float = 0.5, max_buffer: int = 100000):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+
+        self._buffer: List[dict] = []
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._segment: Optional[Path] = None
+        self._segment_size = 0
+        self._flusher = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+        # Stats
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.segments = 0
+        self.last_flush_latency = 0.0
+
+    def record(self, kind: str, **fields):
+        """Buffer one event; never touches the disk."""
+        event = {"t": round(time.time(), 3), "e": kind, **fields}
+        with self._cond:
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+            self._buffer.append(event)
+            self.recorded += 1
+
+    def flush(self):
+        """Write all buffered events to the current segment."""
+        with self._cond:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        started = time.perf_counter()
+        data = "".join(json.dumps(event, separators=(",", ":"), ensure_ascii=False) + "\n"
+                       for event in batch).encode("utf-8")
+        with self._write_lock:
+            if self._segment is None or self._segment_size >= self.segment_bytes:
+                self._rotate()
+            with open(self._segment, "ab") as f:
+                f.write(data)
+            self._segment_size += len(data)
+        self.written += len(batch)
+        self.last_flush_latency = time.perf_counter() - started
+
+    def _rotate(self):
+        # Names sort by creation time; the pid keeps workers' segments apart
+        name = f"{SEGMENT_PREFIX}{int(time.time() * 1000):013d}-{os.getpid()}{SEGMENT_SUFFIX}"
+        self._segment = self.directory / name
+        self._segment_size = 0
+        self.segments += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing game events: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "written": self.written,
+            "segments": self.segments,
+            "last_flush_latency": round(self.last_flush_latency, 4)
+        }
+
+
+def event_log_from_env() -> Optional[EventLog]:
+    """The event log in GAME_EVENT_LOG (a directory), or None when it isn't set."""
+    directory = os.getenv("GAME_EVENT_LOG")
+    if not directory:
+        return None
+    return EventLog(directory, segment_bytes=int(float(os.getenv("GAME_EVENT_SEGMENT_MB", 64)) * 1024 * 1024))
+
+
+# Reading
+
+def segments(directory: str) -> List[Path]:
+    """Segment files in a log directory, oldest first."""
+    return sorted(Path(directory).glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+
+
+def read_events(directory: str) -> Iterator[dict]:
+    """Stream every event in a log directory; a torn last line is skipped."""
+    for path in segments(directory):
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+class Aggregates:
+    """Win rate, attempts-to-win distribution and per-word outcomes, updated one event at a time."""
+
+    def __init__(self):
+        self.events = 0
+        self.started = 0
+        self.outcomes = Counter()
+        self.attempts_to_win = Counter()
+        self.hint_sources = Counter()
+        self.word_games = Counter()
+        self.word_wins = Counter()
+        self.word_attempts = Counter()
+
+    def add(self, event: dict):
+        self.events += 1
+        kind = event.get("e")
+        if kind == "start":
+            self.started += 1
+        elif kind == "hint":
+            self.hint_sources[event.get("s")] += 1
+        elif kind == "guess" and event.get("r") in (WIN, GIVE_UP, LIMIT):
+            outcome, word = event["r"], event.get("w")
+            self.outcomes[outcome] += 1
+            self.word_games[word] += 1
+            self.word_attempts[word] += event.get("n", 0)
+            if outcome == WIN:
+                self.attempts_to_win[event.get("n", 0)] += 1
+                self.word_wins[word] += 1
+
+    def win_rate(self) -> float:
+        finished = sum(self.outcomes.values())
+        return self.outcomes[WIN] / finished if finished else 0.0
+
+    def hardest_words(self, top: int = 10, min_games: int = 5) -> List[Tuple[str, int, float, float]]:
+        """(word, games, win rate, average attempts) for the lowest win rates."""
+        rows = [
+            (word, games, self.word_wins[word] / games, self.word_attempts[word] / games)
+            for word, games in self.word_games.items() if games >= min_games
+        ]
+        rows.sort(key=lambda row: (row[2], -row[3], -row[1]))
+        return rows[:top]
+
+    def summary(self, top: int = 10, min_games: int = 5) -> dict:
+        return {
+            "events": self.events,
+            "games_started": self.started,
+            "games_finished": sum(self.outcomes.values()),
+            "outcomes": dict(self.outcomes),
+            "win_rate": round(self.win_rate(), 4),
+            "attempts_to_win": dict(sorted(self.attempts_to_win.items())),
+            "hint_sources": dict(self.hint_sources),
+            "hardest_words": [
+                {"word": word, "games": games, "win_rate": round(rate, 4), "avg_attempts": round(avg, 2)}
+                for word, games, rate, avg in self.hardest_words(top, min_games)
+            ]
+        }
+
+
+def aggregate(directory: str) -> Aggregates:
+    totals = Aggregates()
+    for event in read_events(directory):
+        totals.add(event)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate a game event log.")
+    parser.add_argument("directory", help="event log directory (GAME_EVENT_LOG)")
+    parser.add_argument("--top", type=int, default=10, help="number of hardest words to list")
+    parser.add_argument("--min-games", type=int, default=5, help="games a word needs to be ranked")
+    args = parser.parse_args(argv)
+    print(json.dumps(aggregate(args.directory).summary(args.top, args.min_games), indent=2))
+
+
+if __name__ == "__main__":
+    main()
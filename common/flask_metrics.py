@@ -0,0 +1,32 @@
+import time
+
+from flask import Response, g, request
+
+from .metrics import CONTENT_TYPE, REQUEST_LATENCY, REQUESTS, render
+
+
+def route_name() -> str:
+    """The matched URL rule, so metrics aren't split per URL."""
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+def init_metrics(app):
+    """Time every request and serve the metrics at /metrics."""
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.get("request_started")
+        if started is not None:
+            route = route_name()
+            REQUEST_LATENCY.observe(time.perf_counter() - started, route)
+            REQUESTS.inc(1, route, response.status_code)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render(), mimetype=CONTENT_TYPE)
+
+    return app
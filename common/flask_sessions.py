@@ -0,0 +1,29 @@
+from flask import g, request
+
+from .session_store import new_session_id
+
+SESSION_COOKIE = "game_id"
+
+
+def session_id() -> str:
+    """Return the game session id for the current request, assigning one if needed."""
+    sid = g.get("session_id")
+    if sid:
+        return sid
+    sid = request.cookies.get(SESSION_COOKIE) or request.headers.get("X-Game-Id")
+    if not sid:
+        sid = new_session_id()
+        g.new_session_id = sid
+    g.session_id = sid
+    return sid
+
+
+def init_sessions(app):
+    """Set the session cookie on responses for newly assigned sessions."""
+    @app.after_request
+    def set_session_cookie(response):
+        sid = g.get("new_session_id")
+        if sid:
+            response.set_cookie(SESSION_COOKIE, sid, httponly=True, samesite="Lax")
+        return response
+    return app
@@ -0,0 +1,179 @@
+"""
+WebSocket transport for the Flask apps, using flask-sock when it is installed.
+
+A game page keeps one connection open. Every action travels over it as a small
+JSON frame, so a guess no longer costs a new HTTP request, body parsing and a
+session cookie lookup:
+
+  client -> server  {"op": "guess", "id": 7, "guess": "cat"}
+  server -> client  {"op": "token", "id": 7, "token": "It's a"}   (streamed hint text)
+                    {"op": "guess", "id": 7, "message": "...", "attempts_made": 3, ...}
+                    {"op": "error", "id": 7, "message": "..."}
+
+A reply frame has the same fields as the matching REST route, plus the op and
+the client's id. The session is resolved once, at the handshake. The REST
+routes are unchanged.
+
+- Heartbeat: the server pings every WS_PING_INTERVAL seconds and drops peers
+  that stop answering. Connections with no frames for WS_IDLE_TIMEOUT seconds
+  are closed.
+- Backpressure: a connection handles one frame at a time. Sends block while the
+  client's receive buffer is full. Streamed tokens are coalesced into at most
+  one frame per WS_TOKEN_INTERVAL seconds, so a slow client gets fewer, larger
+  frames instead of an unbounded queue. Frames over WS_MAX_MESSAGE bytes close
+  the connection.
+
+Without flask-sock, init_websocket() does nothing and pages keep using REST.
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .flask_sessions import session_id
+from .metrics import ERRORS, REQUEST_LATENCY, REQUESTS, register_collector
+
+PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL", 25))
+IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", 600))
+TOKEN_INTERVAL = float(os.getenv("WS_TOKEN_INTERVAL", 0.05))
+MAX_MESSAGE = int(os.getenv("WS_MAX_MESSAGE", 4096))
+
+# handler(sid, frame, emit) -> reply fields; emit(token) streams hint text
+Handler = Callable[[str, dict, Callable[[str], None]], dict]
+
+
+def encode(frame: dict) -> str:
+    return json.dumps(frame, separators=(",", ":"))
+
+
+class TokenStream:
+    """Coalesces streamed tokens into at most one frame per interval."""
+
+    def __init__(self, send: Callable[[dict], None], frame_id, interval: float = TOKEN_INTERVAL):
+        self.send = send
+        self.frame_id = frame_id
+        self.interval = interval
+        self.buffer = []
+        self.last_sent = 0.0
+        self.tokens = 0
+        self.frames = 0
+
+    def __call__(self, token: str):
+        self.buffer.append(token)
+        self.tokens += 1
+        if time.monotonic() - self.last_sent >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.send({"op": "token", "id": self.frame_id, "token": "".join(self.buffer)})
+            self.buffer.clear()
+            self.frames += 1
+            # Measured after the send, so time spent blocked on a slow client widens the next batch
+            self.last_sent = time.monotonic()
+
+
+class SocketStats:
+    """Connection and frame counts for /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.opened = 0
+        self.idle_closed = 0
+        self.frames_in = 0
+        self.frames_out = 0
+        self.tokens = 0
+        self.token_frames = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open": self.open,
+                "opened": self.opened,
+                "idle_closed": self.idle_closed,
+                "frames_in": self.frames_in,
+                "frames_out": self.frames_out,
+                "tokens": self.tokens,
+                "token_frames": self.token_frames
+            }
+
+
+socket_stats = SocketStats()
+
+
+def handle_frame(handlers: Dict[str, Handler], sid: str, data, send: Callable[[dict], None]):
+    """Decode one client frame, run its handler and send the reply."""
+    started = time.perf_counter()
+    try:
+        frame = json.loads(data)
+    except (TypeError, ValueError):
+        frame = None
+    if not isinstance(frame, dict):
+        send({"op": "error", "id": None, "message": "Frames must be JSON objects."})
+        return
+
+    op, frame_id = frame.get("op"), frame.get("id")
+    handler = handlers.get(op)
+    if handler is None:
+        send({"op": "error", "id": frame_id, "message": f"Unknown op: {op}"})
+        return
+
+    route = f"ws:{op}"
+    tokens = TokenStream(send, frame_id)
+    try:
+        reply = handler(sid, frame, tokens)
+        tokens.flush()
+        send({**reply, "op": op, "id": frame_id})
+        status = "ok"
+    except Exception as e:
+        ERRORS.inc(1, "websocket")
+        print(f"Error handling {op} frame: {str(e)}")
+        send({"op": "error", "id": frame_id, "message": "Something went wrong, please try again."})
+        status = "error"
+    socket_stats.add(tokens=tokens.tokens, token_frames=tokens.frames)
+    REQUEST_LATENCY.observe(time.perf_counter() - started, route)
+    REQUESTS.inc(1, route, status)
+
+
+def init_websocket(app, handlers: Dict[str, Handler], path: str = "/ws") -> Optional[object]:
+    """Serve the game actions in ``handlers`` over a WebSocket at ``path``."""
+    try:
+        from flask_sock import ConnectionClosed, Sock
+    except ImportError:
+        return None
+
+    app.config.setdefault("SOCK_SERVER_OPTIONS", {"ping_interval": PING_INTERVAL, "max_message_size": MAX_MESSAGE})
+    sock = Sock(app)
+    register_collector("websocket", socket_stats.stats)
+
+    @sock.route(path)
+    def game_socket(ws):
+        sid = session_id()
+
+        def send(frame):
+            ws.send(encode(frame))
+            socket_stats.add(frames_out=1)
+
+        socket_stats.add(open=1, opened=1)
+        try:
+            while True:
+                data = ws.receive(timeout=IDLE_TIMEOUT)
+                if data is None:
+                    socket_stats.add(idle_closed=1)
+                    ws.close(reason=1000, message="idle")
+                    break
+                socket_stats.add(frames_in=1)
+                handle_frame(handlers, sid, data, send)
+        except ConnectionClosed:
+            pass
+        finally:
+            socket_stats.add(open=-1)
+
+    return sock
@@ -0,0 +1,295 @@
+"""
+Process-wide gateway in front of the LLM provider.
+
+Every call made through common.llm is admitted here first, so a burst of
+traffic queues instead of turning into a storm of 429s:
+
+  - at most LLM_MAX_CONCURRENCY calls are in flight at once
+  - LLM_RPM / LLM_TPM token buckets cap requests and (estimated) tokens
+    per minute; 0 disables a limit
+  - queued calls are admitted by priority (hints before word generation,
+    which usually refills a pool in the background), then in arrival order
+  - identical requests already in flight share one call (single-flight)
+
+Sync callers block on an event and async callers await a future, but both
+queue on the same limits. Queue depth, in-flight calls and wait times are
+available from stats() and /metrics.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .metrics import REGISTRY
+
+PRIORITY_HINT = 0
+PRIORITY_WORD = 1
+PRIORITY_NAMES = {PRIORITY_HINT: "hint", PRIORITY_WORD: "word"}
+
+QUEUE_WAIT = REGISTRY.histogram("llm_queue_wait_seconds", "Time LLM calls waited in the gateway queue.", ["priority"])
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute, up to one minute's worth."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they are now)."""
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        if self.capacity:
+            self._refill(now)
+            self.level -= min(amount, self.capacity)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "wake", "enqueued", "granted", "cancelled")
+
+    def __init__(self, priority: int, seq: int, tokens: int, wake: Callable[[], None]):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.wake = wake
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _Pending:
+    """A call in flight that identical sync requests wait on."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Gateway:
+    """Admits LLM calls under a concurrency cap and rate limits, by priority."""
+
+    def __init__(self, max_concurrency: int = 16, rpm: int = 0, tpm: int = 0):
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+        self._lock = threading.Lock()
+        self._queue = []  # heap of _Waiter
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._timer = None
+        self._pending: Dict[Any, _Pending] = {}
+        self._apending: Dict[Any, asyncio.Future] = {}
+
+        # Stats
+        self.admitted = 0
+        self.coalesced = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    # Admission
+
+    def _enqueue(self, priority: int, tokens: int, wake: Callable[[], None]) -> _Waiter:
+        with self._lock:
+            waiter = _Waiter(priority, next(self._seq), tokens, wake)
+            heapq.heappush(self._queue, waiter)
+            self._dispatch()
+            return waiter
+
+    def _dispatch(self):
+        # Called with the lock held: admit queued calls while limits allow
+        while self._queue and self._in_flight < self.max_concurrency:
+            waiter = self._queue[0]
+            if waiter.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            now = time.monotonic()
+            delay = max(self.requests.wait(1, now), self.tokens.wait(waiter.tokens, now))
+            if delay > 0:
+                self._schedule(delay)
+                return
+            heapq.heappop(self._queue)
+            self.requests.take(1, now)
+            self.tokens.take(waiter.tokens, now)
+            self._in_flight += 1
+            waiter.granted = True
+
+            waited = now - waiter.enqueued
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            QUEUE_WAIT.observe(waited, PRIORITY_NAMES.get(waiter.priority, waiter.priority))
+            waiter.wake()
+
+    def _schedule(self, delay: float):
+        # Re-dispatch once the buckets have refilled
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    def acquire(self, priority: int = PRIORITY_HINT, tokens: int = 0):
+        """Block until a call may start; pair with release()."""
+        admitted = threading.Event()
+        self._enqueue(priority, tokens, admitted.set)
+        admitted.wait()
+
+    def release(self):
+        self._release()
+
+    async def aacquire(self, priority: int = PRIORITY_HINT, tokens: int = 0):
+        """Async version of acquire(); cancelling it gives up the place in the queue."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def grant():
+            if future.cancelled():
+                self._release()
+            else:
+                future.set_result(None)
+
+        waiter = self._enqueue(priority, tokens, lambda: loop.call_soon_threadsafe(grant))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                waiter.cancelled = True
+                granted = waiter.granted
+            if granted and future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    # Calls
+
+    def call(self, fn: Callable[[], Any], key=None, priority: int = PRIORITY_HINT, tokens: int = 0):
+        """Run ``fn`` once admitted; concurrent calls with the same key share its result."""
+        if key is None:
+            return self._run(fn, priority, tokens)
+
+        with self._lock:
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _Pending()
+            else:
+                self.coalesced += 1
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+
+        try:
+            pending.result = self._run(fn, priority, tokens)
+            return pending.result
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.done.set()
+
+    def _run(self, fn: Callable[[], Any], priority: int, tokens: int):
+        self.acquire(priority, tokens)
+        try:
+            return fn()
+        finally:
+            self.release()
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], key=None,
+                    priority: int = PRIORITY_HINT, tokens: int = 0):
+        """Async version of call(); ``fn`` returns a coroutine."""
+        if key is None:
+            return await self._arun(fn, priority, tokens)
+
+        future = self._apending.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # Don't let one waiter's cancellation cancel the shared call
+            return await asyncio.shield(future)
+
+        def finished(future):
+            self._apending.pop(key, None)
+            if not future.cancelled():
+                future.exception()  # retrieved, even if every waiter gave up
+
+        future = asyncio.ensure_future(self._arun(fn, priority, tokens))
+        self._apending[key] = future
+        future.add_done_callback(finished)
+        return await asyncio.shield(future)
+
+    async def _arun(self, fn: Callable[[], Awaitable[Any]], priority: int, tokens: int):
+        await self.aacquire(priority, tokens)
+        try:
+            return await fn()
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": sum(not waiter.cancelled for waiter in self._queue),
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "admitted": self.admitted,
+                "coalesced": self.coalesced,
+                "avg_wait": round(self.total_wait / self.admitted, 4) if self.admitted else 0.0,
+                "max_wait": round(self.max_wait, 4)
+            }
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> Gateway:
+    """Return the process-wide gateway, configured from the environment."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = Gateway(
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 16)),
+                    rpm=int(os.getenv("LLM_RPM", 0)),
+                    tpm=int(os.getenv("LLM_TPM", 0))
+                )
+                REGISTRY.register_collector("llm_gateway", _gateway.stats)
+    return _gateway
+
+
+def set_gateway(gateway: Optional[Gateway]):
+    """Install a gateway explicitly (e.g. with different limits in benchmarks)."""
+    global _gateway
+    _gateway = gateway
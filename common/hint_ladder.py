@@ -0,0 +1,109 @@
+"""
+Per-game hint ladder: graded hints about the target word, generated once.
+
+When a word is picked, one low-priority model call (in the background, so the
+game starts immediately) writes the first three rungs; the last is computed
+locally:
+
+  1. category      what kind of thing it is
+  2. properties    what it looks, feels or tastes like
+  3. size / use    how big it is or what it is used for
+  4. first letter
+
+The ladder is stored with the player's session, so hint requests are served
+locally, in order, without a model call; the model is only asked about
+specific guesses. Ladders are cached per word, as popular words come up in
+many games. A rung the model leaves out or that gives the word away is
+replaced by one computed locally.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from . import llm
+from .local_hints import word_category
+from .metrics import ERRORS
+
+RUNGS = ("category", "properties", "size_use", "first_letter")
+
+LADDER_PROMPT = """You write hints for a word guessing game. For the target word, respond with JSON only:
+{"category": "...", "properties": "...", "size_use": "..."}
+- category: what general kind of thing it is
+- properties: what it looks, feels, sounds or tastes like
+- size_use: how big it is, or what it is used for
+Each hint is one short sentence. Never use the target word or any part of it."""
+
+CACHE_SIZE = 4096
+
+_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+_cache_lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("HINT_LADDER_WORKERS", 4)), thread_name_prefix="hint-ladder")
+
+
+def local_rung(word: str, rung: str) -> str:
+    """A rung computed without the model."""
+    if rung == "category":
+        category = word_category(word)
+        return f"Think {category}." if category else "It's something from everyday life."
+    if rung == "properties":
+        return f"The word has {len(word)} letters."
+    if rung == "size_use":
+        vowels = sum(letter in "aeiou" for letter in word)
+        return f"It has {vowels} vowel{'s' if vowels != 1 else ''}."
+    return f"It starts with '{word[0].upper()}'."
+
+
+def local_ladder(word: str) -> List[str]:
+    return [local_rung(word, rung) for rung in RUNGS]
+
+
+def generate_ladder(word: str) -> List[str]:
+    """Ask the model for the ladder in one call; missing or revealing rungs are filled locally."""
+    word = word.lower()
+    with _cache_lock:
+        if word in _cache:
+            _cache.move_to_end(word)
+            return list(_cache[word])
+
+    try:
+        response = llm.chat(
+            [{"role": "system", "content": LADDER_PROMPT}, {"role": "user", "content": f"Target word: {word}"}],
+            model="gpt-3.5-turbo",
+            temperature=0.7,
+            max_tokens=120,
+            response_format={"type": "json_object"},
+            priority=llm.PRIORITY_WORD
+        )
+        rungs = json.loads(response)
+    except Exception:
+        # Runs in the background for every game, so failures are only counted (game_errors_total{where="hint_ladder"} in /metrics)
+        ERRORS.inc(1, "hint_ladder")
+        return local_ladder(word)
+
+    ladder = []
+    for rung in RUNGS:
+        hint = rungs.get(rung) if rung != "first_letter" and isinstance(rungs, dict) else None
+        if not isinstance(hint, str) or not hint.strip() or word in hint.lower():
+            hint = local_rung(word, rung)
+        ladder.append(hint.strip())
+
+    with _cache_lock:
+        _cache[word] = ladder
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return list(ladder)
+
+
+def build_ladder(word: str, on_ready: Callable[[List[str]], None]) -> Future:
+    """Generate the ladder in the background and pass it to ``on_ready``."""
+    return _pool.submit(lambda: on_ready(generate_ladder(word)))
+
+
+def ladder_rung(ladder: Optional[List[str]], hints_given: int) -> Optional[str]:
+    """The next rung after ``hints_given`` hints (the last one repeats), or None without a ladder."""
+    if not ladder:
+        return None
+    return ladder[min(hints_given, len(ladder) - 1)]
@@ -0,0 +1,257 @@
+"""
+Compact local lexicon: a zero-latency source of game words.
+
+The word list (data/lexicon.tsv: word, category, difficulty) is compiled into a
+binary file that is memory-mapped on load:
+
+    header | offsets | category ids | difficulty ids | index table | index ids | names | words
+
+Words are packed into one UTF-8 buffer addressed by an offsets array, and the
+indexes (by category, length, difficulty and category+difficulty) are sorted
+runs of word ids, so looking up or sampling a filtered word is O(1).
+
+Rebuild with: python -m common.lexicon build
+"""
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DATA_DIR = Path(__file__).parent / "data"
+SOURCE_PATH = DATA_DIR / "lexicon.tsv"
+BINARY_PATH = DATA_DIR / "lexicon.bin"
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+MAGIC = b"LEX1"
+# magic, word count, index count, then byte offsets of each section
+_HEADER = struct.Struct("<4sII8I")
+
+
+def _index_key(kind: str, value) -> str:
+    return f"{kind}:{value}"
+
+
+def _pad(buf: bytearray):
+    # Keep every section 4-byte aligned for the unsigned int views
+    buf.extend(b"\0" * (-len(buf) % 4))
+
+
+def build_lexicon(source: Path = SOURCE_PATH, target: Path = BINARY_PATH):
+    """Compile the TSV word list into the binary lexicon format."""
+    entries = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            word, category, difficulty = line.split("\t")
+            entries.append((word.lower(), category, DIFFICULTIES.index(difficulty)))
+    entries.sort()
+
+    categories = sorted({category for _, category, _ in entries})
+    category_ids = {name: i for i, name in enumerate(categories)}
+
+    offsets = array("I", [0])
+    words = bytearray()
+    word_categories = array("I")
+    word_difficulties = array("I")
+    indexes: Dict[str, List[int]] = {}
+    for word_id, (word, category, difficulty) in enumerate(entries):
+        words.extend(word.encode("utf-8"))
+        offsets.append(len(words))
+        word_categories.append(category_ids[category])
+        word_difficulties.append(difficulty)
+        for key in (_index_key("category", category),
+                    _index_key("length", len(word)),
+                    _index_key("difficulty", DIFFICULTIES[difficulty]),
+                    _index_key("category+difficulty", f"{category}/{DIFFICULTIES[difficulty]}")):
+            indexes.setdefault(key, []).append(word_id)
+
+    # Index table: (start, end) into the concatenated id array, in key order
+    index_keys = sorted(indexes)
+    index_table = array("I")
+    index_ids = array("I")
+    for key in index_keys:
+        index_table.append(len(index_ids))
+        index_ids.extend(indexes[key])
+        index_table.append(len(index_ids))
+    names = "\n".join(categories + index_keys).encode("utf-8")
+
+    body = bytearray()
+    sections = []
+    for section in (offsets, word_categories, word_difficulties, index_table, index_ids):
+        sections.append(_HEADER.size + len(body))
+        body.extend(section.tobytes())
+    sections.append(_HEADER.size + len(body))
+    body.extend(names)
+    _pad(body)
+    sections.append(_HEADER.size + len(body))
+    body.extend(words)
+    sections.append(_HEADER.size + len(body))
+
+    header = _HEADER.pack(MAGIC, len(entries), len(index_keys), *sections)
+    # A temporary file of its own, so workers building at once never replace() a half-written one
+    target = Path(target)
+    fd, tmp = tempfile.mkstemp(prefix=target.name + ".", suffix=".tmp", dir=target.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(body)
+        # mkstemp creates the file private to this user
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class Lexicon:
+    """Read-only, memory-mapped view of a compiled lexicon."""
+
+    def __init__(self, path: Path = BINARY_PATH):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+
+        magic, count, index_count, *sections = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"Not a lexicon file: {path}")
+        (offsets, categories, difficulties, table, ids, names, words, end) = sections
+
+        self._offsets = view[offsets:categories].cast("I")
+        self._categories = view[categories:difficulties].cast("I")
+        self._difficulties = view[difficulties:table].cast("I")
+        self._table = view[table:ids].cast("I")
+        self._ids = view[ids:names].cast("I")
+        self._words = view[words:end]
+
+        all_names = bytes(view[names:words]).rstrip(b"\0").decode("utf-8").split("\n")
+        self.category_names = all_names[:len(all_names) - index_count]
+        self._index_slots = {key: i for i, key in enumerate(all_names[len(all_names) - index_count:])}
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def word(self, word_id: int) -> str:
+        return str(self._words[self._offsets[word_id]:self._offsets[word_id + 1]], "utf-8")
+
+    def find(self, word: str) -> Optional[int]:
+        """Id of a word, or None if it isn't in the lexicon (words are stored sorted)."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.word(mid) < word:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self._count and self.word(lo) == word else None
+
+    def category(self, word_id: int) -> str:
+        return self.category_names[self._categories[word_id]]
+
+    def difficulty(self, word_id: int) -> str:
+        return DIFFICULTIES[self._difficulties[word_id]]
+
+    def index(self, kind: str, value) -> memoryview:
+        """Ids of the words with the given category, length or difficulty."""
+        slot = self._index_slots.get(_index_key(kind, value))
+        if slot is None:
+            return self._ids[0:0]
+        return self._ids[self._table[2 * slot]:self._table[2 * slot + 1]]
+
+    def ids(self, category: Optional[str] = None, difficulty: Optional[str] = None,
+            length: Optional[int] = None) -> Iterable[int]:
+        """Ids of the words matching all the given filters."""
+        if category and difficulty:
+            ids = self.index("category+difficulty", f"{category}/{difficulty}")
+        elif category:
+            ids = self.index("category", category)
+        elif difficulty:
+            ids = self.index("difficulty", difficulty)
+        elif length:
+            return self.index("length", length)
+        else:
+            return range(self._count)
+        if length:
+            return [word_id for word_id in ids if self._offsets[word_id + 1] - self._offsets[word_id] == length]
+        return ids
+
+    def random_word(self, rng=random, **filters) -> Optional[str]:
+        """Uniformly sample a word matching the filters (with repeats)."""
+        ids = self.ids(**filters)
+        if not len(ids):
+            return None
+        return self.word(ids[rng.randrange(len(ids))])
+
+    def sampler(self, rng=None, **filters) -> "LexiconSampler":
+        """Sampler that doesn't repeat a word until every matching word has been used."""
+        return LexiconSampler(self, array("I", self.ids(**filters)), rng or random.Random())
+
+    def close(self):
+        for view in (self._offsets, self._categories, self._difficulties, self._table, self._ids, self._words):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+
+class LexiconSampler:
+    """Draws words without repeats using an incremental Fisher-Yates shuffle."""
+
+    __slots__ = ("lexicon", "_ids", "_remaining", "_rng")
+
+    def __init__(self, lexicon: Lexicon, ids: array, rng: random.Random):
+        self.lexicon = lexicon
+        self._ids = ids
+        self._remaining = len(ids)
+        self._rng = rng
+
+    def next_word(self) -> Optional[str]:
+        return self.next_entry()[0]
+
+    def next_entry(self) -> Tuple[Optional[str], Optional[int]]:
+        """Draw the next (word, word id); starts a new cycle once every word was used."""
+        if not self._ids:
+            return None, None
+        if self._remaining == 0:
+            self._remaining = len(self._ids)
+        i = self._rng.randrange(self._remaining)
+        last = self._remaining - 1
+        ids = self._ids
+        ids[i], ids[last] = ids[last], ids[i]
+        self._remaining = last
+        return self.lexicon.word(ids[last]), ids[last]
+
+
+_lexicon = None
+_lexicon_lock = threading.Lock()
+
+
+def load_lexicon() -> Lexicon:
+    """Return the shared lexicon, compiling it first if the binary is missing or stale."""
+    global _lexicon
+    if _lexicon is None:
+        with _lexicon_lock:
+            if _lexicon is None:
+                if (not BINARY_PATH.exists()
+                        or BINARY_PATH.stat().st_mtime < SOURCE_PATH.stat().st_mtime):
+                    build_lexicon()
+                _lexicon = Lexicon()
+    return _lexicon
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["build"]:
+        build_lexicon()
+        print(f"Lexicon written to {BINARY_PATH}")
+    else:
+        lexicon = load_lexicon()
+        print(f"{len(lexicon)} words in {len(lexicon.category_names)} categories")
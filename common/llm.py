@@ -0,0 +1,413 @@
+"""
+Pluggable LLM backend shared by the game apps.
+
+LLM_MODE selects the backend:
+  live    - call OpenAI directly (default)
+  record  - call OpenAI and append every request/response pair to the cassette
+  replay  - serve responses from the cassette without touching the network
+
+LLM_CASSETTE is the cassette path and LLM_REPLAY_LATENCY optionally injects a
+latency distribution into replay, e.g. "fixed:0.5", "uniform:0.2,0.8",
+"normal:0.6,0.15" or "lognormal:-0.5,0.4" (seconds).
+
+Every backend has sync (chat/stream) and async (achat/astream) methods. The
+live backend's async client shares one keep-alive connection pool sized by
+LLM_MAX_CONNECTIONS / LLM_MAX_KEEPALIVE, with LLM_TIMEOUT seconds per request.
+openai and httpx are only imported when the live backend is first created.
+
+Calls made through the module-level functions are admitted by the shared
+gateway (concurrency cap, rate limits, priority and single-flight, see
+common.gateway) and record latency, token and error metrics (see
+common.metrics). Pass priority=PRIORITY_WORD for word generation. Any error
+from the backend is raised as ProviderError, so callers can tell a provider
+failure from a mistake of their own.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from .gateway import PRIORITY_HINT, PRIORITY_WORD, get_gateway
+from .metrics import LLM_ERRORS, LLM_LATENCY, LLM_TOKENS
+from .tokens import count_message_tokens, count_tokens
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_CASSETTE = Path(__file__).parent.parent / "cassettes" / "llm.jsonl"
+
+# Completion tokens assumed for rate limiting when a call sets no max_tokens
+COMPLETION_ESTIMATE = 150
+
+# LangChain message types -> OpenAI roles
+_ROLES = {"human": "user", "ai": "assistant", "system": "system"}
+
+
+class ProviderError(Exception):
+    """The backend failed to answer (API, transport or replay error); the cause is chained."""
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when no recorded response matches a request."""
+
+
+def to_openai_messages(messages) -> List[Dict[str, str]]:
+    """Convert LangChain messages (or role/content dicts) to OpenAI chat messages."""
+    converted = []
+    for message in messages:
+        if isinstance(message, dict):
+            converted.append({"role": message["role"], "content": message["content"]})
+        else:
+            converted.append({"role": _ROLES.get(message.type, message.type), "content": message.content})
+    return converted
+
+
+def request_key(messages: List[Dict[str, str]], params: dict) -> str:
+    """Stable key for a chat request."""
+    payload = json.dumps({"m": messages, "p": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _prefix_key(messages: List[Dict[str, str]], params: dict) -> str:
+    # Looser key used when replay is not strict: model + first (system) message
+    first = messages[0]["content"] if messages else ""
+    return request_key([{"role": "system", "content": first}], {"model": params.get("model")})
+
+
+class LiveBackend:
+    """Calls the OpenAI chat completions API."""
+
+    def __init__(self, api_key: Optional[str] = None):
+        from openai import OpenAI
+
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.timeout = float(os.getenv("LLM_TIMEOUT", 30))
+        self.client = OpenAI(api_key=self.api_key, timeout=self.timeout)
+        self._async_client = None
+
+    @property
+    def async_client(self):
+        """Async client backed by one shared keep-alive connection pool."""
+        if self._async_client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            limits = httpx.Limits(
+                max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", 100)),
+                max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", 20))
+            )
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=self.timeout,
+                http_client=httpx.AsyncClient(limits=limits, timeout=self.timeout)
+            )
+        return self._async_client
+
+    def chat(self, messages, **params) -> str:
+        params.setdefault("model", DEFAULT_MODEL)
+        response = self.client.chat.completions.create(messages=to_openai_messages(messages), **params)
+        return response.choices[0].message.content
+
+    def stream(self, messages, **params) -> Iterator[str]:
+        params.setdefault("model", DEFAULT_MODEL)
+        response = self.client.chat.completions.create(messages=to_openai_messages(messages), stream=True, **params)
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def achat(self, messages, **params) -> str:
+        params.setdefault("model", DEFAULT_MODEL)
+        response = await self.async_client.chat.completions.create(messages=to_openai_messages(messages), **params)
+        return response.choices[0].message.content
+
+    async def astream(self, messages, **params) -> AsyncIterator[str]:
+        params.setdefault("model", DEFAULT_MODEL)
+        response = await self.async_client.chat.completions.create(
+            messages=to_openai_messages(messages), stream=True, **params
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class Cassette:
+    """Line-delimited JSON file of recorded request/response pairs."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def append(self, key: str, messages, params: dict, response: str):
+        record = {"k": key, "q": {"m": messages, "p": params}, "r": response}
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def load(self):
+        """Yield (key, messages, params, response) for every recorded pair."""
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["k"], record["q"]["m"], record["q"]["p"], record["r"]
+
+
+class RecordingBackend:
+    """Wraps another backend and records every request/response pair."""
+
+    def __init__(self, inner, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def chat(self, messages, **params) -> str:
+        params.setdefault("model", DEFAULT_MODEL)
+        messages = to_openai_messages(messages)
+        response = self.inner.chat(messages, **params)
+        self.cassette.append(request_key(messages, params), messages, params, response)
+        return response
+
+    def stream(self, messages, **params) -> Iterator[str]:
+        params.setdefault("model", DEFAULT_MODEL)
+        messages = to_openai_messages(messages)
+        tokens = []
+        for token in self.inner.stream(messages, **params):
+            tokens.append(token)
+            yield token
+        # Only completed streams are recorded
+        self.cassette.append(request_key(messages, params), messages, params, "".join(tokens))
+
+    async def achat(self, messages, **params) -> str:
+        params.setdefault("model", DEFAULT_MODEL)
+        messages = to_openai_messages(messages)
+        response = await self.inner.achat(messages, **params)
+        self.cassette.append(request_key(messages, params), messages, params, response)
+        return response
+
+    async def astream(self, messages, **params) -> AsyncIterator[str]:
+        params.setdefault("model", DEFAULT_MODEL)
+        messages = to_openai_messages(messages)
+        tokens = []
+        async for token in self.inner.astream(messages, **params):
+            tokens.append(token)
+            yield token
+        self.cassette.append(request_key(messages, params), messages, params, "".join(tokens))
+
+
+def parse_latency(spec: Optional[str]):
+    """Parse a latency spec like "normal:0.6,0.15" into a sampler (or None)."""
+    if not spec:
+        return None
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    samplers = {
+        "fixed": lambda: values[0],
+        "uniform": lambda: random.uniform(values[0], values[1]),
+        "normal": lambda: random.gauss(values[0], values[1]),
+        "lognormal": lambda: random.lognormvariate(values[0], values[1]),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution: {kind}")
+    return lambda: max(0.0, samplers[kind]())
+
+
+class ReplayBackend:
+    """
+    Serves recorded responses with no network access.
+
+    Repeated requests cycle through the responses recorded for them. With
+    strict=False a request that was never recorded is answered from responses
+    recorded for the same model and system prompt.
+    """
+
+    def __init__(self, cassette: Cassette, latency=None, strict: bool = True):
+        self.latency = latency
+        self.strict = strict
+        self._responses = defaultdict(list)
+        self._by_prefix = defaultdict(list)
+        self._next = defaultdict(int)
+        self._lock = threading.Lock()
+        for key, messages, params, response in cassette.load():
+            self._responses[key].append(response)
+            self._by_prefix[_prefix_key(messages, params)].append(response)
+
+    def chat(self, messages, **params) -> str:
+        response = self._lookup(messages, params)
+        if self.latency:
+            time.sleep(self.latency())
+        return response
+
+    def stream(self, messages, **params) -> Iterator[str]:
+        # The injected latency is spent before the first token
+        response = self._lookup(messages, params)
+        if self.latency:
+            time.sleep(self.latency())
+        for token in re.findall(r"\S+\s*|\s+", response):
+            yield token
+
+    async def achat(self, messages, **params) -> str:
+        response = self._lookup(messages, params)
+        if self.latency:
+            await asyncio.sleep(self.latency())
+        return response
+
+    async def astream(self, messages, **params) -> AsyncIterator[str]:
+        response = self._lookup(messages, params)
+        if self.latency:
+            await asyncio.sleep(self.latency())
+        for token in re.findall(r"\S+\s*|\s+", response):
+            yield token
+
+    def _lookup(self, messages, params: dict) -> str:
+        params.setdefault("model", DEFAULT_MODEL)
+        messages = to_openai_messages(messages)
+        key = request_key(messages, params)
+        responses = self._responses.get(key)
+        if not responses and not self.strict:
+            key = _prefix_key(messages, params)
+            responses = self._by_prefix.get(key)
+        if not responses:
+            raise CassetteMiss(key)
+        with self._lock:
+            index = self._next[key]
+            self._next[key] = index + 1
+        return responses[index % len(responses)]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(mode: Optional[str] = None):
+    """Build a backend for the given mode (defaults to LLM_MODE)."""
+    mode = (mode or os.getenv("LLM_MODE", "live")).lower()
+    cassette = Cassette(os.getenv("LLM_CASSETTE", DEFAULT_CASSETTE))
+    if mode == "live":
+        return LiveBackend()
+    if mode == "record":
+        return RecordingBackend(LiveBackend(), cassette)
+    if mode == "replay":
+        return ReplayBackend(
+            cassette,
+            latency=parse_latency(os.getenv("LLM_REPLAY_LATENCY")),
+            strict=os.getenv("LLM_REPLAY_STRICT", "1") != "0"
+        )
+    raise ValueError(f"Unknown LLM_MODE: {mode}")
+
+
+def get_backend():
+    """Return the process-wide backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    """Install a backend explicitly (e.g. for benchmarks)."""
+    global _backend
+    _backend = backend
+
+
+def _prepare(messages, params: dict):
+    # Normalize a request and estimate its tokens for the gateway's rate limits
+    params.setdefault("model", DEFAULT_MODEL)
+    messages = to_openai_messages(messages)
+    prompt_tokens = count_message_tokens(messages, params["model"])
+    return messages, prompt_tokens, prompt_tokens + params.get("max_tokens", COMPLETION_ESTIMATE)
+
+
+def _record(call: str, started: float, prompt_tokens: int, model: str, response: str):
+    LLM_LATENCY.observe(time.perf_counter() - started, call)
+    LLM_TOKENS.inc(prompt_tokens, call, "prompt")
+    LLM_TOKENS.inc(count_tokens(response, model), call, "completion")
+
+
+def chat(messages, priority: int = PRIORITY_HINT, single_flight: bool = True, **params) -> str:
+    """
+    Send a chat request through the gateway and return the reply text.
+    With single_flight=False the call is never shared with an identical one
+    in flight (e.g. for hedged attempts).
+    """
+    messages, prompt_tokens, estimate = _prepare(messages, params)
+
+    def call():
+        started = time.perf_counter()
+        try:
+            response = get_backend().chat(messages, **params)
+        except Exception as e:
+            LLM_ERRORS.inc(1, "chat")
+            raise ProviderError(str(e)) from e
+        _record("chat", started, prompt_tokens, params["model"], response)
+        return response
+
+    key = request_key(messages, params) if single_flight else None
+    return get_gateway().call(call, key, priority, estimate)
+
+
+def stream(messages, priority: int = PRIORITY_HINT, **params) -> Iterator[str]:
+    """Send a chat request through the gateway and yield reply tokens."""
+    messages, prompt_tokens, estimate = _prepare(messages, params)
+    gateway = get_gateway()
+    gateway.acquire(priority, estimate)
+    try:
+        started = time.perf_counter()
+        tokens = []
+        try:
+            for token in get_backend().stream(messages, **params):
+                tokens.append(token)
+                yield token
+        except Exception as e:
+            LLM_ERRORS.inc(1, "stream")
+            raise ProviderError(str(e)) from e
+        _record("stream", started, prompt_tokens, params["model"], "".join(tokens))
+    finally:
+        gateway.release()
+
+
+async def achat(messages, priority: int = PRIORITY_HINT, single_flight: bool = True, **params) -> str:
+    """Async version of chat()."""
+    messages, prompt_tokens, estimate = _prepare(messages, params)
+
+    async def call():
+        started = time.perf_counter()
+        try:
+            response = await get_backend().achat(messages, **params)
+        except Exception as e:
+            LLM_ERRORS.inc(1, "achat")
+            raise ProviderError(str(e)) from e
+        _record("achat", started, prompt_tokens, params["model"], response)
+        return response
+
+    key = request_key(messages, params) if single_flight else None
+    return await get_gateway().acall(call, key, priority, estimate)
+
+
+async def astream(messages, priority: int = PRIORITY_HINT, **params) -> AsyncIterator[str]:
+    """Async version of stream()."""
+    messages, prompt_tokens, estimate = _prepare(messages, params)
+    gateway = get_gateway()
+    await gateway.aacquire(priority, estimate)
+    try:
+        started = time.perf_counter()
+        tokens = []
+        try:
+            async for token in get_backend().astream(messages, **params):
+                tokens.append(token)
+                yield token
+        except Exception as e:
+            LLM_ERRORS.inc(1, "astream")
+            raise ProviderError(str(e)) from e
+        _record("astream", started, prompt_tokens, params["model"], "".join(tokens))
+    finally:
+        gateway.release()
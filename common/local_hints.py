@@ -0,0 +1,44 @@
+"""
+Deterministic hints computed locally, with no model call.
+
+Used whenever the LLM can't answer in time (see common.resilience). Hints get
+more specific as the player uses up attempts: the length comparison first,
+then the word's category from the lexicon, then its first letter and finally
+its last letter.
+"""
+from .lexicon import load_lexicon
+
+# Attempts after which each extra clue is given
+CATEGORY_AFTER = 2
+FIRST_LETTER_AFTER = 4
+LAST_LETTER_AFTER = 7
+
+
+def length_hint(word: str, guess: str) -> str:
+    if len(guess) > len(word):
+        return "The word is shorter"
+    if len(guess) < len(word):
+        return "The word is longer"
+    return "Same length, but not correct"
+
+
+def word_category(word: str):
+    """Category of a word from the lexicon, or None if it isn't listed."""
+    lexicon = load_lexicon()
+    word_id = lexicon.find(word)
+    return lexicon.category(word_id) if word_id is not None else None
+
+
+def local_hint(word: str, guess: str, attempts: int) -> str:
+    """A hint for a wrong guess after ``attempts`` attempts."""
+    word = word.lower()
+    clues = [f"{length_hint(word, guess)} ({len(word)} letters)."]
+    if attempts >= CATEGORY_AFTER:
+        category = word_category(word)
+        if category:
+            clues.append(f"Think {category}.")
+    if attempts >= FIRST_LETTER_AFTER:
+        clues.append(f"It starts with '{word[0]}'.")
+    if attempts >= LAST_LETTER_AFTER:
+        clues.append(f"It ends with '{word[-1]}'.")
+    return "Not quite right. Here's a hint: " + " ".join(clues)
@@ -0,0 +1,225 @@
+"""
+Lightweight in-process metrics, exported in the Prometheus text format.
+
+Recording is cheap enough for the hot path: every metric keeps one shard per
+thread, so incrementing a counter or observing a latency never takes a lock
+(shards are summed when /metrics is scraped), and histogram buckets are
+preallocated per label set. Existing stats() dicts (hint cache, word pool,
+sessions) are exported as gauges by registering them as collectors, so they
+cost nothing until scraped.
+
+    REQUEST_LATENCY.observe(0.12, "/make-guess")
+    LLM_ERRORS.inc(1, "chat")
+    register_collector("hint_cache", hint_cache.stats)
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seconds; from a cached hint to a slow model call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._shards: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            # Only taken the first time a thread records this metric
+            with self._lock:
+                shard = self._shards.setdefault(ident, {})
+        return shard
+
+    def _merged(self) -> Dict[Tuple, List[float]]:
+        with self._lock:
+            shards = list(self._shards.values())
+        merged = {}
+        for shard in shards:
+            for key, values in list(shard.items()):
+                total = merged.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    total[i] += value
+        return merged
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labelled."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, *label_values):
+        shard = self._shard()
+        cell = shard.get(label_values)
+        if cell is None:
+            shard[label_values] = [amount]
+        else:
+            cell[0] += amount
+
+    def value(self, *label_values) -> float:
+        return self._merged().get(label_values, [0])[0]
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, (value,) in sorted(self._merged().items()):
+            lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Latency histogram with fixed buckets; also reports estimated p50/p95/p99."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *label_values):
+        shard = self._shard()
+        cells = shard.get(label_values)
+        if cells is None:
+            # One slot per bucket, then +Inf, then the sum
+            cells = shard[label_values] = [0] * (len(self.buckets) + 2)
+        cells[bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    def time(self, *label_values) -> "_Timer":
+        """Context manager observing the duration of its block."""
+        return _Timer(self, label_values)
+
+    def quantile(self, q: float, counts: List[float]) -> float:
+        """Estimate a quantile from bucket counts by linear interpolation."""
+        total = sum(counts[:-1])
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts[:-1]):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        quantiles = [f"# TYPE {self.name}_quantile gauge"]
+        for key, counts in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket = _labels(self.labels, key, 'le="%s"' % _number(bound))
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(counts[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+            for q in QUANTILES:
+                quantile = _labels(self.labels, key, 'quantile="%s"' % q)
+                quantiles.append(f"{self.name}_quantile{quantile} {_number(self.quantile(q, counts))}")
+        return lines + quantiles if len(quantiles) > 1 else lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "started")
+
+    def __init__(self, histogram: Histogram, label_values: Tuple):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+
+
+class Registry:
+    """The metrics and stats collectors exported by /metrics."""
+
+    def __init__(self, prefix: str = "game"):
+        self.prefix = prefix
+        self._metrics = []
+        self._collectors = {}
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(f"{self.prefix}_{name}", help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(f"{self.prefix}_{name}", help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, name: str, stats: Callable[[], dict]):
+        """Export the numeric values of a stats() dict as gauges, read at scrape time."""
+        self._collectors[name] = stats
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, stats in self._collectors.items():
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"Error collecting {name} stats: {str(e)}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"{self.prefix}_{name}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "request_duration_seconds", "Time to handle a request (to the first byte for streams).", ["route"])
+REQUESTS = REGISTRY.counter("requests_total", "Requests handled, by route and status code.", ["route", "status"])
+LLM_LATENCY = REGISTRY.histogram(
+    "llm_request_duration_seconds", "LLM call latency (to the last token for streams).", ["call"])
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "LLM tokens, counted locally.", ["call", "kind"])
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "Failed LLM calls.", ["call"])
+ERRORS = REGISTRY.counter("errors_total", "Errors handled by the game apps.", ["where"])
+
+register_collector = REGISTRY.register_collector
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,232 @@
+"""
+SQLite-backed persistence for game sessions.
+
+The database runs in WAL mode so several worker processes can share one file
+(readers never block the writer). Handlers never write to disk themselves:
+SessionDB.save() puts the encoded session in an in-memory write-behind buffer
+and a background thread flushes dirty sessions in batches, one transaction per
+batch. Loads read through the buffer first (including a batch still being
+flushed), then the database.
+
+Every row carries a version, and a flush only overwrites the version its
+worker last read or wrote (compare-and-set). Workers cache the sessions they
+serve, so without sticky routing a worker may still answer from a copy another
+worker has since changed. Its next flush of that session is then rejected
+instead of overwriting the newer row: the conflict is counted, the stale
+write is dropped and ``on_conflict(session_id)`` lets the cache forget its
+copy, so the worker reloads the game on the player's next request.
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional
+
+# Records at least this long are zlib-compressed
+COMPRESS_THRESHOLD = 128
+
+_DELETED = object()
+
+
+def pack(record) -> bytes:
+    """Compact serialized form of a JSON-compatible record."""
+    data = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(data) >= COMPRESS_THRESHOLD:
+        return b"z" + zlib.compress(data)
+    return b"j" + data
+
+
+def unpack(data: bytes):
+    """Inverse of pack()."""
+    data = bytes(data)
+    if data[:1] == b"z":
+        return json.loads(zlib.decompress(data[1:]))
+    return json.loads(data[1:])
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a SQLite connection in WAL mode, shareable between threads."""
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+def sqlite_checkpointer(path: str):
+    """LangGraph checkpointer on a WAL-mode SQLite database (needs langgraph-checkpoint-sqlite)."""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    return SqliteSaver(connect(path))
+
+
+class SessionDB:
+    """
+    Write-behind SQLite store of sessions.
+
+    ``to_record``/``from_record`` convert a session to and from a
+    JSON-compatible record, which is stored packed (see pack()).
+    ``on_conflict(session_id)`` is called when a flush finds the session's row
+    changed by another worker (see SessionStore, which sets it).
+    """
+
+    def __init__(self, path: str, to_record: Callable[[Any], Any], from_record: Callable[[Any], Any],
+                 flush_interval: float = 0.2, batch_size: int = 500,
+                 on_conflict: Optional[Callable[[str], None]] = None):
+        self.path = path
+        self.to_record = to_record
+        self.from_record = from_record
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.on_conflict = on_conflict
+
+        self._conn = connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data BLOB NOT NULL, updated REAL NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 0)"
+        )
+        # Databases created before rows were versioned
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")]
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._db_lock = threading.Lock()
+        self._dirty = {}  # session id -> packed bytes, or _DELETED
+        self._flushing = {}  # the batch being written, still visible to load()
+        self._versions: Dict[str, int] = {}  # session id -> row version this worker last read or wrote
+        self._cond = threading.Condition()
+        self._flusher = threading.Thread(target=self._run, name="session-db", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+        # Stats
+        self.flushes = 0
+        self.rows_written = 0
+        self.conflicts = 0
+        self.last_flush_latency = 0.0
+        self.loads = 0
+
+    def save(self, session_id: str, session: Any):
+        """Mark a session dirty; it is written by the next batch."""
+        data = pack(self.to_record(session))
+        with self._cond:
+            self._dirty[session_id] = data
+            if len(self._dirty) >= self.batch_size:
+                self._cond.notify()
+
+    def delete(self, session_id: str):
+        with self._cond:
+            self._dirty[session_id] = _DELETED
+
+    def load(self, session_id: str) -> Optional[Any]:
+        """Read-through load: the write-behind buffer first, then the database."""
+        with self._cond:
+            data = self._dirty.get(session_id)
+            if data is None:
+                data = self._flushing.get(session_id)
+        if data is _DELETED:
+            return None
+        if data is None:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT data, version FROM sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+            if row is None:
+                return None
+            data, version = row
+            with self._cond:
+                self._versions[session_id] = version
+        self.loads += 1
+        return self.from_record(unpack(data))
+
+    def forget(self, session_id: str):
+        """The session left the worker's cache: drop its row version unless a write still needs it."""
+        with self._cond:
+            if session_id not in self._dirty and session_id not in self._flushing:
+                self._versions.pop(session_id, None)
+
+    def flush(self):
+        """Write all dirty sessions in one transaction, each only over the row version it was based on."""
+        with self._db_lock:
+            with self._cond:
+                batch, self._dirty = self._dirty, {}
+                self._flushing = batch
+                versions = {sid: self._versions.get(sid) for sid in batch}
+            if not batch:
+                return
+            started = time.perf_counter()
+            now = time.time()
+            written, conflicts = {}, []
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sid, data in batch.items():
+                    version = versions[sid]
+                    if data is _DELETED:
+                        self._conn.execute("DELETE FROM sessions WHERE id = ?", (sid,))
+                        continue
+                    if version is None:
+                        # A session this worker created: it mustn't replace one created elsewhere
+                        cursor = self._conn.execute(
+                            "INSERT INTO sessions (id, data, updated, version) VALUES (?, ?, ?, 1) "
+                            "ON CONFLICT(id) DO NOTHING",
+                            (sid, data, now)
+                        )
+                    else:
+                        cursor = self._conn.execute(
+                            "UPDATE sessions SET data = ?, updated = ?, version = version + 1 "
+                            "WHERE id = ? AND version = ?",
+                            (data, now, sid, version)
+                        )
+                    if cursor.rowcount:
+                        written[sid] = (version or 0) + 1
+                    else:
+                        conflicts.append(sid)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # Put the batch back unless newer writes superseded it
+                with self._cond:
+                    for sid, data in batch.items():
+                        self._dirty.setdefault(sid, data)
+                    self._flushing = {}
+                raise
+            with self._cond:
+                self._flushing = {}
+                for sid in batch:
+                    self._versions.pop(sid, None)
+                self._versions.update(written)
+                for sid in conflicts:
+                    # Newer saves were made from the same stale copy
+                    self._dirty.pop(sid, None)
+        self.flushes += 1
+        self.rows_written += len(batch) - len(conflicts)
+        self.conflicts += len(conflicts)
+        self.last_flush_latency = time.perf_counter() - started
+        if self.on_conflict is not None:
+            for sid in conflicts:
+                self.on_conflict(sid)
+
+    def purge(self, older_than: float):
+        """Delete sessions not updated in the last ``older_than`` seconds."""
+        with self._db_lock:
+            self._conn.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - older_than,))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing sessions: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._dirty),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "conflicts": self.conflicts,
+            "last_flush_latency": round(self.last_flush_latency, 4),
+            "loads": self.loads
+        }
@@ -0,0 +1,242 @@
+"""
+Latency guards for LLM calls: a hard timeout, an optional hedged second
+attempt and a circuit breaker.
+
+Guard.call() runs the call on a bounded thread pool and waits at most
+``timeout`` seconds. If the first attempt hasn't answered after
+``hedge_after`` seconds a second, identical attempt is started and whichever
+finishes first wins. Timeouts and errors of ``failure_types`` (for LLM calls,
+common.llm.ProviderError) count as failures; any other error is the caller's
+own (e.g. a bad request), so it is raised unchanged without counting. After
+``failure_threshold`` consecutive failures the breaker opens and calls fail
+fast with Unavailable for ``reset_timeout`` seconds, after which one trial
+call is let through (half-open). Guard.stream() bounds a streamed call the
+same way: the first item must arrive within ``timeout`` seconds and the whole
+stream within a total deadline. Callers answer Unavailable from a local
+fallback (see common.local_hints), so every guess is answered within the
+timeout even when the provider is down.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class Unavailable(Exception):
+    """The call timed out, failed or was refused by an open circuit breaker."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+
+        # Stats
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; in half-open state only one trial call is allowed."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._trial = False
+            if self._state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+
+    def release(self):
+        """The allowed call ended in neither success nor failure; a half-open breaker lets another trial through."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        state = self.state
+        return {
+            "state": state,
+            "open": int(state == OPEN),
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
+
+
+class Guard:
+    """Timeout, hedging and circuit breaking around blocking calls."""
+
+    def __init__(self, timeout: float = 3.0, hedge_after: Optional[float] = None,
+                 breaker: Optional[CircuitBreaker] = None, workers: int = 32,
+                 failure_types: Tuple[Type[BaseException], ...] = (Exception,)):
+        self.timeout = timeout
+        self.failure_types = failure_types
+        self.hedge_after = hedge_after if hedge_after and hedge_after < timeout else None
+        self.breaker = breaker or CircuitBreaker()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="guarded-call")
+
+        # Stats
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Run ``fn`` within the timeout, or raise Unavailable (errors not in ``failure_types`` are raised as is)."""
+        if not self.breaker.allow():
+            raise Unavailable("circuit breaker is open")
+        self.calls += 1
+        deadline = time.monotonic() + self.timeout
+        attempts = [self._pool.submit(fn)]
+        try:
+            if self.hedge_after is not None:
+                done, _ = wait(attempts, timeout=self.hedge_after)
+                if not done:
+                    self.hedged += 1
+                    attempts.append(self._pool.submit(fn))
+            # First attempt to succeed wins; a failed attempt waits for the other
+            pending = set(attempts)
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    self.timeouts += 1
+                    raise Unavailable(f"no answer within {self.timeout}s")
+                for attempt in done:
+                    error = attempt.exception()
+                    if error is None:
+                        if attempt is not attempts[0]:
+                            self.hedge_wins += 1
+                        self.breaker.record_success()
+                        return attempt.result()
+                    if not isinstance(error, self.failure_types):
+                        # Says nothing about the provider's health
+                        self.breaker.release()
+                        raise error
+            self.errors += 1
+            raise Unavailable(str(attempts[0].exception())) from attempts[0].exception()
+        except Unavailable:
+            self.breaker.record_failure()
+            raise
+        finally:
+            # Attempts still running finish in the background; queued ones are dropped
+            for attempt in attempts:
+                attempt.cancel()
+
+    def stream(self, fn: Callable[[], Iterable[T]], total: float) -> Iterator[T]:
+        """
+        Yield the items of ``fn()``, read on the pool: the first within the timeout and
+        all of them within ``total`` seconds, or raise Unavailable (no hedging).
+        """
+        if not self.breaker.allow():
+            raise Unavailable("circuit breaker is open")
+        self.calls += 1
+        items = queue.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def pump():
+            try:
+                for item in fn():
+                    if stop.is_set():
+                        return
+                    items.put((item, None))
+                items.put((done, None))
+            except BaseException as e:
+                items.put((done, e))
+
+        start = time.monotonic()
+        first_by, deadline = start + self.timeout, start + total
+        started = recorded = False
+        self._pool.submit(pump)
+        try:
+            while True:
+                try:
+                    item, error = items.get(timeout=max(0.0, min(first_by, deadline) - time.monotonic()))
+                except queue.Empty:
+                    self.timeouts += 1
+                    recorded = True
+                    self.breaker.record_failure()
+                    raise Unavailable(f"stream not finished within {total}s" if started
+                                      else f"no answer within {self.timeout}s") from None
+                if item is not done:
+                    started, first_by = True, deadline
+                    yield item
+                elif error is None:
+                    recorded = True
+                    self.breaker.record_success()
+                    return
+                elif isinstance(error, self.failure_types):
+                    self.errors += 1
+                    recorded = True
+                    self.breaker.record_failure()
+                    raise Unavailable(str(error)) from error
+                else:
+                    raise error
+        finally:
+            # Also reached when the consumer stops early (e.g. a client disconnects);
+            # the pump stops at its next item and a half-open breaker isn't left waiting
+            stop.set()
+            if not recorded:
+                self.breaker.release()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "timeout": self.timeout,
+            "breaker": self.breaker.stats()
+        }
+
+
+def guard_from_env(prefix: str = "HINT", failure_types: Tuple[Type[BaseException], ...] = (Exception,)) -> Guard:
+    """Guard configured from <prefix>_TIMEOUT, <prefix>_HEDGE_AFTER and the LLM_BREAKER_* settings."""
+    return Guard(
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT", 3.0)),
+        hedge_after=float(os.getenv(f"{prefix}_HEDGE_AFTER", 1.5)) or None,
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", 5)),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET", 30))
+        ),
+        failure_types=failure_types
+    )
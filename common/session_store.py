@@ -0,0 +1,208 @@
+import secrets
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+
+def new_session_id() -> str:
+    """Return a new random session id."""
+    return secrets.token_urlsafe(16)
+
+
+class _Entry:
+    __slots__ = ("session", "last_seen")
+
+    def __init__(self, session: Any, last_seen: float):
+        self.session = session
+        self.last_seen = last_seen
+
+
+class _Stripe:
+    __slots__ = ("lock", "entries")
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.entries = OrderedDict()  # session id -> _Entry, least recently used first
+
+
+class SessionStore:
+    """
+    Session-keyed store of live games.
+
+    Sessions are spread over a fixed number of stripes, each guarded by its own
+    lock, so concurrent requests for different players rarely contend. Each
+    stripe keeps its entries in LRU order: idle sessions older than ``ttl`` are
+    evicted lazily, and when a stripe is full the least recently used session
+    is dropped, which puts a hard cap on the number of live sessions.
+    ``on_evict(session_id, session)`` is called for expired and evicted sessions.
+
+    With a ``backing`` store (see common.persistence.SessionDB) the in-memory
+    stripes act as a cache: sessions missing from memory are loaded through it
+    (outside the stripe lock), save() hands a mutated session to it and
+    discard() deletes it there too. A cached session whose write the backing
+    store rejects as stale is dropped, so the next get() reloads it.
+
+    Stripe locks are shared by many players, so they are only held for quick
+    reads and updates. A turn that calls the model is serialized with
+    turn_lock(), which only blocks the same player's other requests.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_sessions: int = 10000,
+                 ttl: float = 1800.0, stripes: int = 16,
+                 on_evict: Optional[Callable[[str, Any], None]] = None,
+                 backing=None):
+        self.factory = factory
+        self.on_evict = on_evict
+        self.backing = backing
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._stripe_cap = max(1, -(-max_sessions // stripes))
+        # Dropped once no request holds or waits for them
+        self._turn_locks = weakref.WeakValueDictionary()
+        self._turn_locks_lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+        if backing is not None:
+            backing.on_conflict = self._invalidate
+
+    def _stripe(self, session_id: str) -> _Stripe:
+        return self._stripes[hash(session_id) % len(self._stripes)]
+
+    def lock_for(self, session_id: str) -> threading.RLock:
+        """Return the lock guarding this session; hold it while mutating the session."""
+        return self._stripe(session_id).lock
+
+    def turn_lock(self, session_id: str) -> threading.Lock:
+        """Return the lock serializing this session's turns; it may be held across model calls."""
+        with self._turn_locks_lock:
+            lock = self._turn_locks.get(session_id)
+            if lock is None:
+                lock = self._turn_locks[session_id] = threading.Lock()
+            return lock
+
+    @contextmanager
+    def locked(self, session_id: str, create: bool = False) -> Iterator[Optional[Any]]:
+        """
+        Hold the session's stripe lock and yield its live session (or a new one with
+        ``create``). A session missing from memory is loaded before taking the lock.
+        """
+        lookup = self.get_or_create if create else self.get
+        lookup(session_id)
+        with self.lock_for(session_id):
+            # Cached by now, unless it was evicted or discarded in between
+            yield lookup(session_id)
+
+    def get(self, session_id: Optional[str]) -> Optional[Any]:
+        """Return the live session for an id, or None if missing or expired."""
+        if not session_id:
+            return None
+        stripe = self._stripe(session_id)
+        now = time.monotonic()
+        with stripe.lock:
+            entry = stripe.entries.get(session_id)
+            if entry is not None:
+                if now - entry.last_seen > self.ttl:
+                    del stripe.entries[session_id]
+                    self.expirations += 1
+                    self._evicted(session_id, entry)
+                    return None
+                entry.last_seen = now
+                stripe.entries.move_to_end(session_id)
+                return entry.session
+        return self._load(stripe, session_id, now)
+
+    def create(self, session_id: str) -> Any:
+        """Create (or replace) the session for an id."""
+        stripe = self._stripe(session_id)
+        now = time.monotonic()
+        with stripe.lock:
+            stripe.entries.pop(session_id, None)
+            self._evict(stripe, now)
+            session = self.factory()
+            stripe.entries[session_id] = _Entry(session, now)
+            return session
+
+    def _load(self, stripe: _Stripe, session_id: str, now: float) -> Optional[Any]:
+        if self.backing is None:
+            return None
+        # A database read, so other sessions on the stripe aren't blocked by it
+        session = self.backing.load(session_id)
+        if session is None:
+            return None
+        with stripe.lock:
+            entry = stripe.entries.get(session_id)
+            if entry is not None:
+                # Loaded or created by another request meanwhile: everyone shares that copy
+                return entry.session
+            self._evict(stripe, now)
+            stripe.entries[session_id] = _Entry(session, now)
+            return session
+
+    def _invalidate(self, session_id: str):
+        """Drop a cached session another worker has changed; the next get() reloads it."""
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            stripe.entries.pop(session_id, None)
+
+    def save(self, session_id: str, session: Any):
+        """Persist a mutated session to the backing store, if there is one."""
+        if self.backing is not None:
+            self.backing.save(session_id, session)
+
+    def get_or_create(self, session_id: str) -> Any:
+        """Return the live session for an id, creating it if needed."""
+        session = self.get(session_id)
+        if session is not None:
+            return session
+        with self.lock_for(session_id):
+            entry = self._stripe(session_id).entries.get(session_id)
+            # Loaded or created by another request meanwhile
+            return entry.session if entry is not None else self.create(session_id)
+
+    def discard(self, session_id: Optional[str]) -> Optional[Any]:
+        """Remove a session, returning it if it was live."""
+        if not session_id:
+            return None
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            entry = stripe.entries.pop(session_id, None)
+            if self.backing is not None:
+                self.backing.delete(session_id)
+            return entry.session if entry else None
+
+    def _evict(self, stripe: _Stripe, now: float):
+        # Entries are in LRU order, so expired sessions sit at the front
+        entries = stripe.entries
+        while entries:
+            oldest = next(iter(entries.values()))
+            if now - oldest.last_seen <= self.ttl:
+                break
+            self._evicted(*entries.popitem(last=False))
+            self.expirations += 1
+        while len(entries) >= self._stripe_cap:
+            self._evicted(*entries.popitem(last=False))
+            self.evictions += 1
+
+    def _evicted(self, session_id: str, entry: _Entry):
+        if self.backing is not None:
+            self.backing.forget(session_id)
+        if self.on_evict is not None:
+            self.on_evict(session_id, entry.session)
+
+    def __len__(self) -> int:
+        return sum(len(stripe.entries) for stripe in self._stripes)
+
+    def stats(self) -> dict:
+        return {
+            "live_sessions": len(self),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "stripes": len(self._stripes),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "backing": self.backing.stats() if self.backing is not None else None
+        }
@@ -0,0 +1,13 @@
+import json
+from typing import Optional
+
+# Headers for Server-Sent Events responses; X-Accel-Buffering stops nginx buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events message."""
+    payload = json.dumps(data, separators=(",", ":"))
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
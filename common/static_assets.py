@@ -0,0 +1,102 @@
+"""
+Cheap front-end delivery for the Flask apps.
+
+- CachedPage holds a page rendered once, with gzip (and brotli, when the
+  brotli package is installed) variants precomputed and an ETag, so serving
+  it is a dictionary lookup; a matching If-None-Match gets a 304.
+- init_static_assets() fingerprints every file in the app's static folder at
+  startup: url_for('static', ...) adds ?v=<content hash>, and responses for
+  the current fingerprint are cached by browsers as immutable for a year.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+from flask import Response, render_template, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class CachedPage:
+    """A rendered page with precomputed compressed variants and ETag."""
+
+    def __init__(self, body: bytes, mimetype: str = "text/html"):
+        self.mimetype = mimetype
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.variants = {"gzip": gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body, quality=11)
+        self.body = body
+
+    def response(self) -> Response:
+        """Serve the page for the current request."""
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if request.if_none_match.contains(self.etag.strip('"')):
+            return Response(status=304, headers=headers)
+
+        body = self.body
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and request.accept_encodings[encoding]:
+                body = self.variants[encoding]
+                headers["Content-Encoding"] = encoding
+                break
+        return Response(body, mimetype=self.mimetype, headers=headers)
+
+
+class LazyPage:
+    """A CachedPage rendered on first use (rendering needs a request context for url_for)."""
+
+    def __init__(self, render: Callable[[], str]):
+        self.render = render
+        self._page: Optional[CachedPage] = None
+        self._lock = threading.Lock()
+
+    def response(self) -> Response:
+        if self._page is None:
+            with self._lock:
+                if self._page is None:
+                    self._page = CachedPage(self.render().encode("utf-8"))
+        return self._page.response()
+
+
+def cached_template(name: str, **context) -> LazyPage:
+    """A template rendered once and then served from memory."""
+    return LazyPage(lambda: render_template(name, **context))
+
+
+def fingerprint(folder: str) -> Dict[str, str]:
+    """Content hash of every file under a folder, keyed by its path relative to it."""
+    hashes = {}
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()[:10]
+            hashes[os.path.relpath(path, folder).replace(os.sep, "/")] = digest
+    return hashes
+
+
+def init_static_assets(app):
+    """Version static URLs by content hash and serve versioned assets as immutable."""
+    hashes = fingerprint(app.static_folder) if app.static_folder and os.path.isdir(app.static_folder) else {}
+
+    @app.url_defaults
+    def add_fingerprint(endpoint, values):
+        if endpoint == "static" and values.get("filename") in hashes:
+            values["v"] = hashes[values["filename"]]
+
+    @app.after_request
+    def cache_static(response):
+        if (request.endpoint == "static" and response.status_code == 200
+                and request.args.get("v") == hashes.get(request.view_args.get("filename"))):
+            response.headers["Cache-Control"] = IMMUTABLE
+        return response
+
+    return app
@@ -0,0 +1,52 @@
+"""
+Local token counting, so prompt sizes can be checked before they are sent.
+
+Uses tiktoken when it is installed (imported on first use) and falls back to
+a ~4 characters per token estimate otherwise, or when the encoding can't be
+loaded (tiktoken downloads it on first use, which fails offline).
+"""
+from functools import lru_cache
+from typing import Dict, List
+
+from .metrics import ERRORS
+
+# Per-message overhead of the chat format (role and separators)
+MESSAGE_OVERHEAD = 4
+
+
+@lru_cache(maxsize=1)
+def _tiktoken():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """The model's encoding, or None without tiktoken or when it can't be loaded (cached either way)."""
+    tiktoken = _tiktoken()
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        ERRORS.inc(1, "token_encoding")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Number of tokens in a piece of text."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str = "gpt-3.5-turbo") -> int:
+    """Number of prompt tokens for a list of chat messages."""
+    return sum(count_tokens(m["content"], model) + MESSAGE_OVERHEAD for m in messages) + 2
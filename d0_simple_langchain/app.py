@@ -1,194 +1,605 @@
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, request
 from dotenv import load_dotenv
 import os
-from openai import OpenAI
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage, AIMessage
+import sys
+from pathlib import Path
 import random
+import re
+import json
+from concurrent.futures import ThreadPoolExecutor
+from word_pool import RecentWords, WordPool
+from hint_cache import HintCache
 
-# Load environment variables
+# Load environment variables (before the modules below read their settings)
 load_dotenv()
 
+# Make the shared ``common`` package importable when run as a script
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from common import llm
+from common.lexicon import load_lexicon
+from common.session_store import SessionStore
+from common.persistence import SessionDB
+from common.flask_sessions import init_sessions, session_id
+from common.flask_metrics import init_metrics
+from common.flask_ws import init_websocket
+from common.event_log import GIVE_UP, LIMIT, MISS, WIN, event_log_from_env
+from common.static_assets import cached_template, init_static_assets
+from common.metrics import ERRORS, register_collector
+from common.local_hints import local_hint
+from common.answer_match import answer_matcher, is_correct
+from common.hint_ladder import build_ladder, ladder_rung
+from common.resilience import OPEN, Guard, Unavailable, guard_from_env
+from common.sse import SSE_HEADERS, sse_event
+from prompts import compile_batch_hint_prompt, compile_hint_prompt
+
 # Initialize Flask app
 app = Flask(__name__)
+init_sessions(app)
+init_metrics(app)
+init_static_assets(app)
+
+# The game page is rendered once and served from memory
+index_page = cached_template('index.html')
+
+# A valid game word: a single lowercase word
+VALID_WORD = re.compile(r"[a-z]+")
+
+class GameSession:
+    """State of one player's game"""
+    __slots__ = ('current_word', 'guesses', 'game_active', 'attempts_made', 'max_attempts', 'word_sampler',
+                 'hint_ladder', 'hints_given')
+
+    def __init__(self):
+        self.current_word = None
+        self.guesses = []
+        self.game_active = False
+        self.attempts_made = 0
+        self.max_attempts = 10
+        self.word_sampler = None
+        self.hint_ladder = None
+        self.hints_given = 0
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def new_game(self, word):
+        """Reset the session for a new game with the given word"""
+        self.current_word = word
+        self.guesses = []
+        self.game_active = True
+        self.attempts_made = 0
+        self.hint_ladder = None
+        self.hints_given = 0
 
-# Initialize LangChain chat model
-chat_model = ChatOpenAI(
-    model_name="gpt-3.5-turbo",
-    temperature=0.7,
-    openai_api_key=os.getenv('OPENAI_API_KEY')
+    def to_record(self):
+        """Compact, JSON-compatible form of the session (the word sampler isn't persisted)"""
+        return [self.current_word, self.guesses, self.game_active, self.attempts_made, self.max_attempts,
+                self.hint_ladder, self.hints_given]
+
+    @classmethod
+    def from_record(cls, record):
+        game = cls()
+        game.current_word, game.guesses, game.game_active, game.attempts_made, game.max_attempts = record[:5]
+        # Records saved before hint ladders have five fields
+        if len(record) > 5:
+            game.hint_ladder, game.hints_given = record[5:7]
+        return game
+
+# Games are persisted to SQLite when GAME_DB is set, so they survive restarts
+# and can be shared by several workers
+game_db = None
+if os.getenv('GAME_DB'):
+    game_db = SessionDB(
+        os.getenv('GAME_DB'),
+        GameSession.to_record,
+        GameSession.from_record,
+        flush_interval=float(os.getenv('GAME_DB_FLUSH_INTERVAL', 0.2))
+    )
+
+# Live games, keyed by the player's session cookie
+sessions = SessionStore(
+    GameSession,
+    max_sessions=int(os.getenv('MAX_SESSIONS', 10000)),
+    ttl=float(os.getenv('SESSION_TTL', 1800)),
+    backing=game_db
 )
 
-# Game state
-game_state = {
-    'current_word': None,
-    'guesses': [],
-    'game_active': False,
-    'attempts_made': 0,
-    'max_attempts': 10,
-    'previous_words': set()
-}
+# Recently generated words, shared by all players for word diversity
+recent_words = RecentWords(int(os.getenv('RECENT_WORDS_HORIZON', 100)))
+
+# Words requested from the model per call
+word_batch_size = int(os.getenv('WORD_BATCH_SIZE', 10))
+
+def get_random_words(count=None):
+    """Generate a batch of new random words in a single OpenAI API call"""
+    count = count or word_batch_size
+    prompts = [
+        f"Generate {count} random common nouns (objects, animals, food, etc.) that would be fun to guess in a word game.",
+        f"Give me {count} simple words from these categories: fruits, animals, household items, or clothing.",
+        f"Provide {count} common English words that a child would know, suitable for a guessing game.",
+        f"Generate {count} random words from everyday life (food, objects, animals, etc.). Keep them simple."
+    ]
+    
+    response = llm.chat(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": 'You are a word generator for a word guessing game. Respond with JSON only, in the form {"words": ["word", ...]}. Each word must be a single lowercase English word.'},
+            {"role": "user", "content": random.choice(prompts)}
+        ],
+        max_tokens=12 * count + 20,
+        temperature=0.9,
+        response_format={"type": "json_object"},
+        priority=llm.PRIORITY_WORD
+    )
+    
+    # Keep valid single lowercase words we haven't used recently
+    words = []
+    for word in json.loads(response).get("words", []):
+        word = str(word).strip().lower()
+        if VALID_WORD.fullmatch(word) and recent_words.add(word):
+            words.append(word)
+    return words
 
 def get_random_word():
     """Generate a random word using OpenAI API"""
     try:
-        prompts = [
-            "Generate a random common noun (object, animal, food, etc.) that would be fun to guess in a word game. Respond with just the word.",
-            "Give me a simple word from one of these categories: fruits, animals, household items, or clothing. Respond with just the word.",
-            "Provide a common English word that a child would know, suitable for a guessing game. Respond with just the word.",
-            "Generate a random word from everyday life (could be food, object, animal, etc.). Keep it simple and respond with just the word."
-        ]
-        
         for _ in range(3):
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a word generator for a word guessing game. Provide only a single word."},
-                    {"role": "user", "content": random.choice(prompts)}
-                ],
-                max_tokens=50,
-                temperature=0.9
-            )
-            
-            word = response.choices[0].message.content.strip().lower()
-            
-            if word not in game_state['previous_words']:
-                game_state['previous_words'].add(word)
-                if len(game_state['previous_words']) > 20:
-                    game_state['previous_words'].pop()
-                return word
-        
-        game_state['previous_words'].clear()
-        return word
+            words = get_random_words()
+            if words:
+                # Keep the rest of the batch for later games
+                for word in words[1:]:
+                    word_pool.put(word)
+                return words[0]
+        return None
     
     except Exception as e:
+        ERRORS.inc(1, "word_generation")
         print(f"Error getting word from OpenAI: {str(e)}")
         return None
 
-def get_game_response(guess):
-    """Get AI response for the player's guess"""
-    messages = [
-        SystemMessage(content="""You are a word guessing game assistant. Follow these strict rules:
-        1. NEVER reveal the target word under any circumstances, unless the player says "I give up"
-        2. NEVER use the target word in your responses, even as part of another word
-        3. NEVER directly confirm if any part of the guess is correct
-        4. Instead, provide clever hints about:
-           - General category (animal, object, food, etc.)
-           - Size comparison (bigger, smaller)
-           - Common uses or characteristics
-           - First letter (only if player is struggling after multiple guesses)
-        5. Keep responses brief, encouraging, and fun
-        6. If the guess is completely wrong, guide them in a new direction
-        7. If they're getting closer, encourage them without specifying which parts are correct"""),
-        HumanMessage(content=f"""The target word is '{game_state['current_word']}'. 
-        Player's guess: '{guess}'.
-        Previous guesses: {game_state['guesses']}.
-        Provide a hint following the strict rules above.""")
-    ]
-    
-    response = chat_model.predict_messages(messages)
-    return response.content
+# Pool of pre-generated words, refilled in the background
+word_pool = WordPool(
+    get_random_words,
+    size=int(os.getenv('WORD_POOL_SIZE', 20)),
+    low_watermark=int(os.getenv('WORD_POOL_LOW', 5)),
+    high_watermark=int(os.getenv('WORD_POOL_HIGH', 20))
+)
+
+# Where words come from: 'llm' (pooled model output) or 'lexicon' (local word list)
+word_source = os.getenv('WORD_SOURCE', 'llm')
+
+def lexicon_word(game):
+    """A word from the local word list, not repeating the player's recent words"""
+    if game.word_sampler is None:
+        game.word_sampler = load_lexicon().sampler()
+    return game.word_sampler.next_word()
+
+def pick_word(game):
+    """Pick a word without calling the model; returns None if none is ready"""
+    if word_source == 'lexicon':
+        return lexicon_word(game)
+    return word_pool.get()
+
+def next_word(game):
+    """
+    Pick a word for a new game, falling back to a direct LLM call when the pool is empty,
+    and to the local word list when the model is down (or its breaker is open)
+    """
+    word = pick_word(game)
+    if word is None and hint_guard.breaker.state != OPEN:
+        word = get_random_word()
+    if word is None:
+        ERRORS.inc(1, "word_fallback")
+        word = lexicon_word(game)
+    return word
+
+# Cache of hint responses, shared by all players
+hint_cache = HintCache(
+    max_bytes=int(os.getenv('HINT_CACHE_BYTES', 1 << 20)),
+    ttl=float(os.getenv('HINT_CACHE_TTL', 3600)),
+    attempt_bucket=int(os.getenv('HINT_CACHE_ATTEMPT_BUCKET', 4)),
+    stampede_protection=os.getenv('HINT_CACHE_STAMPEDE', '1') != '0'
+)
+
+register_collector("sessions", sessions.stats)
+register_collector("word_pool", word_pool.stats)
+# Bounds hint latency (HINT_TIMEOUT, HINT_HEDGE_AFTER) and stops calling a
+# failing provider (LLM_BREAKER_FAILURES, LLM_BREAKER_RESET); only provider
+# errors and timeouts count against the breaker
+hint_guard = guard_from_env("HINT", failure_types=(llm.ProviderError,))
+# Streamed hints: the first token is due within HINT_TIMEOUT, the whole hint within this
+HINT_STREAM_TIMEOUT = float(os.getenv('HINT_STREAM_TIMEOUT', 15))
+
+# Append-only record of starts, guesses, hints and outcomes (GAME_EVENT_LOG)
+event_log = event_log_from_env()
+if event_log:
+    register_collector("event_log", event_log.stats)
+
+def log_event(kind, **fields):
+    if event_log:
+        event_log.record(kind, **fields)
+
+register_collector("hint_cache", hint_cache.stats)
+register_collector("hint_guard", hint_guard.stats)
+register_collector("hint_breaker", hint_guard.breaker.stats)
+
+def get_game_response(game, guess, sid=None):
+    """
+    Get AI response for the player's guess, served from the hint cache when possible.
+    Falls back to a local hint when the model can't answer within the timeout.
+    """
+    key = hint_cache.key(game.current_word, guess, game.attempts_made)
+    source = "cache"
+
+    def compute():
+        nonlocal source
+        source = "model"
+        # Built outside the guard, so a prompt error never counts as a provider failure
+        messages = hint_messages(game, guess)
+        return hint_guard.call(lambda: generate_hint(messages))
+
+    try:
+        message = hint_cache.get_or_compute(key, compute)
+    except Unavailable:
+        ERRORS.inc(1, "hint_fallback")
+        source = "local"
+        message = local_hint(game.current_word, guess, game.attempts_made)
+    log_event("hint", g=sid, w=game.current_word, n=game.attempts_made, s=source)
+    return message
+
+def generate_hint(messages):
+    """Ask the model for a hint with the compiled hint prompt"""
+    # Not coalesced with identical calls, so a hedged attempt is a real second request
+    return llm.chat(messages, model="gpt-3.5-turbo", temperature=0.7, single_flight=False)
+
+# Batch guessing: most items per request, and hints requested per model call
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 500))
+HINT_BATCH_SIZE = int(os.getenv('HINT_BATCH_SIZE', 20))
+batch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hint-batch')
+
+# Batch hint calls answer many hints at once, so they get a longer timeout
+# (HINT_BATCH_TIMEOUT, no hedging) but share the hint calls' circuit breaker
+batch_guard = Guard(
+    timeout=float(os.getenv('HINT_BATCH_TIMEOUT', 10)),
+    breaker=hint_guard.breaker,
+    workers=8,
+    failure_types=(llm.ProviderError,)
+)
+register_collector("hint_batch_guard", batch_guard.stats)
+
+def generate_hints(items):
+    """
+    Ask the model for hints for several (word, guess, guesses) items in one JSON call.
+    Returns one hint per item, None where the model gave none or couldn't answer in time.
+    """
+    # Each item is trimmed to the hint prompt budget, outside the guard
+    messages = compile_batch_hint_prompt(items)
+    try:
+        response = batch_guard.call(lambda: llm.chat(
+            messages,
+            model="gpt-3.5-turbo",
+            temperature=0.7,
+            max_tokens=60 * len(items) + 20,
+            response_format={"type": "json_object"}
+        ))
+        hints = json.loads(response).get("hints", [])
+    except Exception as e:
+        ERRORS.inc(1, "hint_batch")
+        print(f"Error getting batch hints: {str(e)}")
+        hints = []
+    hints = [hint if isinstance(hint, str) and hint.strip() else None for hint in hints[:len(items)]]
+    return hints + [None] * (len(items) - len(hints))
+
+def hint_messages(game, guess):
+    """Build the hint prompt for the player's guess (see prompts.py)"""
+    return compile_hint_prompt(game.current_word, guess, game.guesses, game.attempts_made)
 
 @app.route('/')
 def home():
     """Render the game interface"""
-    return render_template('index.html')
+    # Assign the session now, so the WebSocket handshake carries its cookie
+    session_id()
+    return index_page.response()
+
+def begin_game(sid):
+    """Pick a word and start a new game for the session"""
+    game = sessions.get_or_create(sid)
+    word = next_word(game)
+    with sessions.lock_for(sid):
+        game.new_game(word)
+        sessions.save(sid, game)
+    # Precompute the accepted spellings so guesses are matched with a set lookup
+    answer_matcher(word)
+    # Graded hints for the whole game, from one background call
+    build_ladder(word, lambda ladder: store_ladder(sid, word, ladder))
+    log_event("start", g=sid, w=word)
+    return {
+        "message": "I've picked a word! Start guessing!",
+        "status": "success"
+    }
 
 @app.route('/start-game', methods=['POST'])
 def start_game():
     """Initialize a new game"""
-    game_state['current_word'] = get_random_word()
-    game_state['guesses'] = []
-    game_state['game_active'] = True
-    game_state['attempts_made'] = 0
-    return jsonify({
-        "message": "I've picked a word! Start guessing!",
-        "status": "success"
-    })
+    return jsonify(begin_game(session_id()))
+
+def store_ladder(sid, word, ladder):
+    """Keep a generated hint ladder with the session, if it is still playing that word"""
+    with sessions.locked(sid) as game:
+        if game and game.current_word == word:
+            game.hint_ladder = ladder
+            sessions.save(sid, game)
+
+def next_hint(sid):
+    """Serve the next rung of the game's hint ladder, without a model call"""
+    with sessions.locked(sid) as game:
+        if not game or not game.game_active:
+            return {
+                "message": "Please start a new game first!",
+                "status": "error"
+            }
+        message = ladder_rung(game.hint_ladder, game.hints_given)
+        source = "ladder"
+        if message is None:
+            # The ladder isn't ready yet
+            last_guess = game.guesses[-1] if game.guesses else ""
+            message = local_hint(game.current_word, last_guess, game.attempts_made)
+            source = "local"
+        else:
+            game.hints_given += 1
+            sessions.save(sid, game)
+    log_event("hint", g=sid, w=game.current_word, n=game.attempts_made, s=source)
+    return {
+        "message": message,
+        "status": "success",
+        "attempts_made": game.attempts_made
+    }
+
+@app.route('/get-hint', methods=['POST'])
+def get_hint():
+    """Give the next hint about the word"""
+    return jsonify(next_hint(session_id()))
+
+@app.route('/word-pool-stats', methods=['GET'])
+def word_pool_stats():
+    """Expose word pool depth, refill latency and fallback counts"""
+    return jsonify(word_pool.stats())
+
+@app.route('/hint-cache-stats', methods=['GET'])
+def hint_cache_stats():
+    """Expose hint cache size, hit/miss and eviction counts"""
+    return jsonify(hint_cache.stats())
+
+def reveal(sid):
+    """Reveal the session's current word"""
+    game = sessions.get(sid)
+    if game and game.current_word:
+        return {
+            "message": f"The word was '{game.current_word}'.",
+            "status": "success"
+        }
+    return {
+        "message": "No word to reveal.",
+        "status": "error"
+    }
 
 @app.route('/reveal-word', methods=['POST'])
 def reveal_word():
     """Reveal the current word"""
-    if game_state['current_word']:
-        return jsonify({
-            "message": f"The word was '{game_state['current_word']}'.",
+    return jsonify(reveal(session_id()))
+
+def end_game(sid):
+    """End the session's game"""
+    game = sessions.discard(sid)
+    if game and game.current_word:
+        return {
+            "message": f"Thanks for playing! The word was '{game.current_word}'. Goodbye!",
             "status": "success"
-        })
-    return jsonify({
-        "message": "No word to reveal.",
-        "status": "error"
-    })
+        }
+    return {
+        "message": "Thanks for playing! Goodbye!",
+        "status": "success"
+    }
 
 @app.route('/exit-game', methods=['POST'])
 def exit_game():
     """End the current game"""
-    if game_state['current_word']:
-        word = game_state['current_word']
-        game_state['current_word'] = None
-        game_state['guesses'] = []
-        game_state['game_active'] = False
-        game_state['attempts_made'] = 0
-        return jsonify({
-            "message": f"Thanks for playing! The word was '{word}'. Goodbye!",
-            "status": "success"
-        })
-    return jsonify({
-        "message": "Thanks for playing! Goodbye!",
-        "status": "success"
-    })
+    return jsonify(end_game(session_id()))
 
-@app.route('/make-guess', methods=['POST'])
-def make_guess():
-    """Process a player's guess"""
-    if not game_state['game_active']:
-        return jsonify({
-            "message": "Please start a new game first!",
-            "status": "error",
-            "attempts_made": game_state['attempts_made']
-        })
+def resolve_guess(sid, guess):
+    """
+    Record a guess against the player's game and resolve it locally if possible.
+    Returns (game, result); result["message"] is None when a hint is still needed.
+    """
+    with sessions.locked(sid) as game:
+        if not game or not game.game_active:
+            return game, {
+                "message": "Please start a new game first!",
+                "status": "error",
+                "attempts_made": game.attempts_made if game else 0
+            }
+        result = apply_guess(game, guess)
+        sessions.save(sid, game)
+    log_event("guess", g=sid, w=game.current_word, n=result["attempts_made"], r=guess_outcome(game, guess, result))
+    return game, result
 
-    guess = request.json.get('guess', '').lower().strip()
-    game_state['attempts_made'] += 1
-    
+def guess_outcome(game, guess, result):
+    """Event log outcome of an applied guess, checked in the same order as apply_guess"""
+    if not result["game_over"]:
+        return MISS
     if guess.lower() in ['i give up', 'give up', 'giveup']:
-        game_state['game_active'] = False
-        return jsonify({
-            "message": f"The word was '{game_state['current_word']}'. Don't worry, try another round!",
+        return GIVE_UP
+    if result["attempts_made"] >= game.max_attempts:
+        return LIMIT
+    return WIN
+
+def apply_guess(game, guess):
+    """Update an active game with a guess; the caller holds the session lock"""
+    game.attempts_made += 1
+
+    if guess.lower() in ['i give up', 'give up', 'giveup']:
+        game.game_active = False
+        return {
+            "message": f"The word was '{game.current_word}'. Don't worry, try another round!",
             "status": "success",
             "game_over": True,
-            "attempts_made": game_state['attempts_made']
-        })
+            "attempts_made": game.attempts_made
+        }
 
-    game_state['guesses'].append(guess)
+    game.guesses.append(guess)
 
-    if game_state['attempts_made'] >= game_state['max_attempts']:
-        game_state['game_active'] = False
-        return jsonify({
-            "message": f"Game Over! You've reached {game_state['max_attempts']} attempts. The word was '{game_state['current_word']}'.",
+    if game.attempts_made >= game.max_attempts:
+        game.game_active = False
+        return {
+            "message": f"Game Over! You've reached {game.max_attempts} attempts. The word was '{game.current_word}'.",
             "status": "success",
             "game_over": True,
-            "attempts_made": game_state['attempts_made']
-        })
+            "attempts_made": game.attempts_made
+        }
 
-    if guess == game_state['current_word']:
-        game_state['game_active'] = False
-        return jsonify({
-            "message": f"Congratulations! You've won! The word was '{game_state['current_word']}'!",
+    # Plurals, articles and small misspellings of the word count as correct
+    if is_correct(game.current_word, guess):
+        game.game_active = False
+        return {
+            "message": f"Congratulations! You've won! The word was '{game.current_word}'!",
             "status": "success",
             "game_over": True,
-            "attempts_made": game_state['attempts_made']
-        })
+            "attempts_made": game.attempts_made
+        }
 
-    response = get_game_response(guess)
-    return jsonify({
-        "message": response,
+    return {
+        "message": None,
         "status": "success",
         "game_over": False,
-        "attempts_made": game_state['attempts_made']
-    })
+        "attempts_made": game.attempts_made
+    }
+
+@app.route('/make-guess', methods=['POST'])
+def make_guess():
+    """Process a player's guess"""
+    guess = request.json.get('guess', '').lower().strip()
+    game, result = resolve_guess(session_id(), guess)
+    if result["message"] is None:
+        # Call the model outside the session lock
+        result["message"] = get_game_response(game, guess, session_id())
+    return jsonify(result)
+
+def hint_events(game, guess, result, sid=None):
+    """
+    Stream the hint for a resolved guess: yields ("token", {"token": ...}) events,
+    then ("done", result) with the full message.
+    """
+    if result["message"] is None:
+        key = hint_cache.key(game.current_word, guess, result["attempts_made"])
+        message = hint_cache.get(key)
+        source = "cache"
+        if message is None:
+            # Built outside the guard, so a prompt error never counts as a provider failure
+            messages = hint_messages(game, guess)
+            tokens = []
+            stream = hint_guard.stream(
+                lambda: llm.stream(messages, model="gpt-3.5-turbo", temperature=0.7),
+                total=HINT_STREAM_TIMEOUT
+            )
+            try:
+                for token in stream:
+                    tokens.append(token)
+                    yield "token", {"token": token}
+            except Unavailable:
+                ERRORS.inc(1, "hint_stream")
+                message = local_hint(game.current_word, guess, result["attempts_made"])
+                source = "local"
+            else:
+                message = "".join(tokens)
+                hint_cache.put(key, message)
+                source = "model"
+            finally:
+                # A client that disconnects mid-stream closes this generator; the guard
+                # then settles the breaker instead of leaving a half-open trial taken
+                stream.close()
+        log_event("hint", g=sid, w=game.current_word, n=result["attempts_made"], s=source)
+        result["message"] = message
+    yield "done", result
+
+@app.route('/make-guess/stream', methods=['POST'])
+def make_guess_stream():
+    """Process a player's guess, streaming the hint as Server-Sent Events"""
+    guess = request.json.get('guess', '').lower().strip()
+    # Game state is updated before streaming starts, so a client that
+    # disconnects mid-stream leaves the game consistent
+    sid = session_id()
+    game, result = resolve_guess(sid, guess)
+    events = hint_events(game, guess, result, sid)
+    return Response((sse_event(data, event if event == "done" else None) for event, data in events),
+                    mimetype='text/event-stream', headers=SSE_HEADERS)
+
+def stream_guess(sid, frame, emit):
+    """WebSocket guess: hint tokens go to emit(), the reply carries the game state"""
+    guess = str(frame.get('guess', '')).lower().strip()
+    game, result = resolve_guess(sid, guess)
+    for event, data in hint_events(game, guess, result, sid):
+        if event == "token":
+            emit(data["token"])
+        else:
+            return data
+
+@app.route('/make-guesses', methods=['POST'])
+def make_guesses():
+    """
+    Process many guesses at once: {"guesses": [{"game_id": ..., "guess": ...}, ...]}.
+    Wins, give-ups and attempt limits are resolved locally; the remaining hints
+    are requested from the model in batches of HINT_BATCH_SIZE.
+    """
+    items = (request.json or {}).get('guesses', [])
+    if (not isinstance(items, list) or len(items) > BATCH_MAX_ITEMS
+            or not all(isinstance(item, dict) for item in items)):
+        return jsonify({
+            "message": f"Send a list of at most {BATCH_MAX_ITEMS} guesses.",
+            "status": "error"
+        }), 400
+
+    results = []
+    needed = {}  # hint cache key -> ((word, guess, guesses), results waiting for it)
+    for item in items:
+        game_id = str(item.get('game_id', ''))
+        guess = str(item.get('guess', '')).lower().strip()
+        game, result = resolve_guess(game_id, guess)
+        result = {"game_id": game_id, "guess": guess, **result}
+        results.append(result)
+        if result["message"] is None:
+            key = hint_cache.key(game.current_word, guess, result["attempts_made"])
+            result["message"] = hint_cache.get(key)
+            if result["message"] is not None:
+                log_event("hint", g=game_id, w=game.current_word, n=result["attempts_made"], s="cache")
+            else:
+                item = (game.current_word, guess, list(game.guesses))
+                needed.setdefault(key, (item, []))[1].append(result)
+
+    keys = list(needed)
+    batches = [keys[i:i + HINT_BATCH_SIZE] for i in range(0, len(keys), HINT_BATCH_SIZE)]
+    hint_batches = batch_pool.map(lambda batch: generate_hints([needed[key][0] for key in batch]), batches)
+    for batch, hints in zip(batches, hint_batches):
+        for key, hint in zip(batch, hints):
+            (word, guess, _), waiting = needed[key]
+            source = "batch"
+            if hint is None:
+                hint = local_hint(word, guess, waiting[0]["attempts_made"])
+                source = "local"
+            else:
+                hint_cache.put(key, hint)
+            for result in waiting:
+                result["message"] = hint
+                log_event("hint", g=result["game_id"], w=word, n=result["attempts_made"], s=source)
+
+    return jsonify({"results": results, "status": "success"})
+
+# Persistent per-page channel for the same actions (see common/flask_ws.py)
+init_websocket(app, {
+    "start": lambda sid, frame, emit: begin_game(sid),
+    "guess": stream_guess,
+    "hint": lambda sid, frame, emit: next_hint(sid),
+    "reveal": lambda sid, frame, emit: reveal(sid),
+    "exit": lambda sid, frame, emit: end_game(sid)
+})
 
 if __name__ == '__main__':
     app.run(debug=True)
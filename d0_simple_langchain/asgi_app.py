@@ -0,0 +1,285 @@
+"""
+Async (ASGI) serving mode for the d0 game.
+
+Serves the same routes as app.py, but handlers are coroutines that await the
+LLM through the backend's async client (one shared keep-alive connection
+pool), so a worker keeps thousands of games in flight instead of one per
+thread. Game sessions, the word pool and the hint cache are shared with app.py.
+
+Run with (Python 3.11+):
+    uvicorn asgi_app:app --app-dir d0_simple_langchain
+"""
+import asyncio
+import os
+import time
+
+from quart import Quart, Response, g, jsonify, render_template, request
+
+import app as game_app
+from app import (hint_cache, hint_guard, hint_messages, log_event, next_hint, pick_word, resolve_guess,
+                 sessions, store_ladder, word_pool)
+from common import llm
+from common.answer_match import answer_matcher
+from common.hint_ladder import build_ladder
+from common.flask_sessions import SESSION_COOKIE
+from common.local_hints import local_hint
+from common.resilience import Unavailable
+from common.metrics import CONTENT_TYPE, ERRORS, REQUEST_LATENCY, REQUESTS, render
+from common.session_store import new_session_id
+from common.sse import SSE_HEADERS, sse_event
+
+app = Quart(__name__)
+
+# Bound the number of concurrent LLM calls and how long each may take
+llm_slots = asyncio.Semaphore(int(os.getenv('ASGI_MAX_LLM_CALLS', 500)))
+llm_timeout = float(os.getenv('ASGI_LLM_TIMEOUT', hint_guard.timeout))
+
+# In-flight hint requests, so concurrent identical misses share one call
+inflight_hints = {}
+
+def session_id():
+    """Return the game session id for the current request, assigning one if needed"""
+    sid = g.get('session_id')
+    if sid:
+        return sid
+    sid = request.cookies.get(SESSION_COOKIE) or request.headers.get('X-Game-Id')
+    if not sid:
+        sid = new_session_id()
+        g.new_session_id = sid
+    g.session_id = sid
+    return sid
+
+
+@app.before_request
+async def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+async def record_request(response):
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - started, route)
+        REQUESTS.inc(1, route, response.status_code)
+    return response
+
+
+@app.after_request
+async def set_session_cookie(response):
+    sid = g.get('new_session_id')
+    if sid:
+        response.set_cookie(SESSION_COOKIE, sid, httponly=True, samesite='Lax')
+    return response
+
+
+async def get_game_response(game, guess, attempts_made):
+    """
+    Get an AI hint for the player's guess, served from the hint cache when possible.
+    Returns (hint, source), source being "cache" or "model" as in the event log.
+    """
+    key = hint_cache.key(game.current_word, guess, attempts_made)
+    message = hint_cache.get(key)
+    if message is not None:
+        return message, "cache"
+
+    pending = inflight_hints.get(key)
+    if pending is not None:
+        # Counted like the sync app's stampede-protected cache: one model call, the rest cache hits
+        return await asyncio.shield(pending), "cache"
+
+    messages = hint_messages(game, guess)
+    # Shares the sync app's circuit breaker
+    if not hint_guard.breaker.allow():
+        raise Unavailable("circuit breaker is open")
+
+    pending = asyncio.get_running_loop().create_future()
+    inflight_hints[key] = pending
+    recorded = False
+    try:
+        async with llm_slots:
+            message = await asyncio.wait_for(
+                llm.achat(messages, model="gpt-3.5-turbo", temperature=0.7),
+                llm_timeout
+            )
+        recorded = True
+        hint_guard.breaker.record_success()
+        hint_cache.put(key, message)
+        pending.set_result(message)
+        return message, "model"
+    except Exception as e:
+        # Only provider errors and timeouts count against the breaker
+        if isinstance(e, (llm.ProviderError, asyncio.TimeoutError)):
+            recorded = True
+            hint_guard.breaker.record_failure()
+        pending.set_exception(e)
+        # Mark the exception retrieved when nobody else was waiting on it
+        pending.exception()
+        raise
+    finally:
+        inflight_hints.pop(key, None)
+        if not recorded:
+            hint_guard.breaker.release()
+        if not pending.done():
+            # This request was cancelled (e.g. its client went away): coalesced waiters fall back
+            pending.set_exception(Unavailable("hint request was cancelled"))
+            pending.exception()
+
+
+@app.route('/')
+async def home():
+    """Render the game interface"""
+    return await render_template('index.html')
+
+
+@app.route('/start-game', methods=['POST'])
+async def start_game():
+    """Initialize a new game"""
+    sid = session_id()
+    game = sessions.get_or_create(sid)
+    word = pick_word(game)
+    if word is None:
+        # Pool is empty: generate a word (or take one from the lexicon) without blocking the event loop
+        async with llm_slots:
+            word = await asyncio.to_thread(game_app.next_word, game)
+    with sessions.lock_for(sid):
+        game.new_game(word)
+        sessions.save(sid, game)
+    # Same per-game setup as the sync app: accepted spellings and the hint ladder (in the background)
+    answer_matcher(word)
+    build_ladder(word, lambda ladder: store_ladder(sid, word, ladder))
+    log_event("start", g=sid, w=word)
+    return jsonify({
+        "message": "I've picked a word! Start guessing!",
+        "status": "success"
+    })
+
+
+@app.route('/get-hint', methods=['POST'])
+async def get_hint():
+    """Give the next hint about the word (served from the game's hint ladder, no model call)"""
+    return jsonify(next_hint(session_id()))
+
+
+@app.route('/word-pool-stats', methods=['GET'])
+async def word_pool_stats():
+    return jsonify(word_pool.stats())
+
+
+@app.route('/hint-cache-stats', methods=['GET'])
+async def hint_cache_stats():
+    return jsonify(hint_cache.stats())
+
+
+@app.route('/reveal-word', methods=['POST'])
+async def reveal_word():
+    """Reveal the current word"""
+    game = sessions.get(session_id())
+    if game and game.current_word:
+        return jsonify({
+            "message": f"The word was '{game.current_word}'.",
+            "status": "success"
+        })
+    return jsonify({
+        "message": "No word to reveal.",
+        "status": "error"
+    })
+
+
+@app.route('/exit-game', methods=['POST'])
+async def exit_game():
+    """End the current game"""
+    game = sessions.discard(session_id())
+    if game and game.current_word:
+        return jsonify({
+            "message": f"Thanks for playing! The word was '{game.current_word}'. Goodbye!",
+            "status": "success"
+        })
+    return jsonify({
+        "message": "Thanks for playing! Goodbye!",
+        "status": "success"
+    })
+
+
+@app.route('/metrics')
+async def metrics():
+    return Response(render(), mimetype=CONTENT_TYPE)
+
+
+@app.route('/make-guess', methods=['POST'])
+async def make_guess():
+    """Process a player's guess"""
+    data = await request.get_json()
+    guess = data.get('guess', '').lower().strip()
+    # resolve_guess() logs the guess and its outcome
+    sid = session_id()
+    game, result = resolve_guess(sid, guess)
+    if result["message"] is None:
+        try:
+            result["message"], source = await get_game_response(game, guess, result["attempts_made"])
+        except Exception as e:
+            ERRORS.inc(1, "hint")
+            print(f"Error getting hint: {str(e)}")
+            result["message"] = local_hint(game.current_word, guess, result["attempts_made"])
+            source = "local"
+        log_event("hint", g=sid, w=game.current_word, n=result["attempts_made"], s=source)
+    return jsonify(result)
+
+
+@app.route('/make-guess/stream', methods=['POST'])
+async def make_guess_stream():
+    """Process a player's guess, streaming the hint as Server-Sent Events"""
+    data = await request.get_json()
+    guess = data.get('guess', '').lower().strip()
+    # Game state is updated (and the guess logged) before streaming starts,
+    # so a client that disconnects mid-stream leaves the game consistent
+    sid = session_id()
+    game, result = resolve_guess(sid, guess)
+
+    async def events():
+        if result["message"] is None:
+            key = hint_cache.key(game.current_word, guess, result["attempts_made"])
+            message = hint_cache.get(key)
+            source = "cache"
+            if message is None:
+                # Built before the breaker check, so a prompt error never takes its trial
+                messages = hint_messages(game, guess)
+                if not hint_guard.breaker.allow():
+                    message = local_hint(game.current_word, guess, result["attempts_made"])
+                    source = "local"
+                else:
+                    tokens = []
+                    recorded = False
+                    try:
+                        async with llm_slots:
+                            async with asyncio.timeout(llm_timeout):
+                                async for token in llm.astream(messages, model="gpt-3.5-turbo", temperature=0.7):
+                                    tokens.append(token)
+                                    yield sse_event({"token": token})
+                        recorded = True
+                        hint_guard.breaker.record_success()
+                        message = "".join(tokens)
+                        hint_cache.put(key, message)
+                        source = "model"
+                    except Exception as e:
+                        # Only provider errors and timeouts count against the breaker
+                        if isinstance(e, (llm.ProviderError, asyncio.TimeoutError)):
+                            recorded = True
+                            hint_guard.breaker.record_failure()
+                        ERRORS.inc(1, "hint_stream")
+                        print(f"Error streaming hint: {str(e)}")
+                        message = local_hint(game.current_word, guess, result["attempts_made"])
+                        source = "local"
+                    finally:
+                        # Also reached when the client disconnects (the generator is closed or cancelled)
+                        if not recorded:
+                            hint_guard.breaker.release()
+            log_event("hint", g=sid, w=game.current_word, n=result["attempts_made"], s=source)
+            result["message"] = message
+        yield sse_event(result, "done")
+
+    return Response(events(), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+
+if __name__ == '__main__':
+    app.run()
@@ -0,0 +1,142 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+def normalize_guess(guess: str) -> str:
+    """Lowercase a guess and strip punctuation and extra whitespace."""
+    guess = re.sub(r"[^\w\s]", "", guess.lower())
+    return " ".join(guess.split())
+
+
+class _Pending:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class HintCache:
+    """
+    LRU + TTL cache of hint responses keyed by (word, normalized guess, attempt bucket).
+
+    Total size is bounded in bytes of cached text. With stampede protection on,
+    concurrent misses for the same key share a single computation.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 20, ttl: float = 3600.0,
+                 attempt_bucket: int = 4, stampede_protection: bool = True):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.attempt_bucket = max(1, attempt_bucket)
+        self.stampede_protection = stampede_protection
+
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def key(self, word: str, guess: str, attempts: int) -> Tuple[str, str, int]:
+        return (word, normalize_guess(guess), attempts // self.attempt_bucket)
+
+    @staticmethod
+    def _size(key, value: str) -> int:
+        return len(value.encode("utf-8")) + len(key[0]) + len(key[1]) + 64
+
+    def get(self, key) -> Optional[str]:
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def _lookup(self, key) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, size = entry
+        if time.monotonic() > expires_at:
+            del self._entries[key]
+            self.bytes -= size
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value: str):
+        size = self._size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self.bytes -= old[2]
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute: Callable[[], str]) -> str:
+        """Return the cached hint for key, computing (once) and caching it on a miss."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            self.misses += 1
+            pending = self._pending.get(key) if self.stampede_protection else None
+            if pending is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                pending = _Pending()
+                leader = True
+                if self.stampede_protection:
+                    self._pending[key] = pending
+
+        if not leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = compute()
+            self.put(key, pending.value)
+            return pending.value
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            if self.stampede_protection:
+                with self._lock:
+                    self._pending.pop(key, None)
+            pending.event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
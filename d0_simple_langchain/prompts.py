@@ -0,0 +1,124 @@
+"""
+Hint prompt compilation for d0.
+
+The rules are an immutable system message, byte-identical on every call, so
+provider-side prompt caching can reuse it. Only the short user message varies:
+the target word, the guess and the most recent previous guesses, encoded
+compactly. Prompts are counted locally before they are sent; older guesses are
+dropped to stay within HINT_PROMPT_BUDGET tokens (then an overlong guess is
+cut), and the size of every prompt is recorded per attempt
+(game_hint_prompt_tokens in /metrics).
+"""
+import os
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+from common.metrics import REGISTRY
+from common.tokens import MESSAGE_OVERHEAD, count_tokens
+
+MODEL = "gpt-3.5-turbo"
+
+HINT_RULES = """You are a word guessing game assistant. Follow these strict rules:
+1. NEVER reveal the target word under any circumstances, unless the player says "I give up"
+2. NEVER use the target word in your responses, even as part of another word
+3. NEVER directly confirm if any part of the guess is correct
+4. Instead, provide clever hints about:
+   - General category (animal, object, food, etc.)
+   - Size comparison (bigger, smaller)
+   - Common uses or characteristics
+   - First letter (only if player is struggling after multiple guesses)
+5. Keep responses brief, encouraging, and fun
+6. If the guess is completely wrong, guide them in a new direction
+7. If they're getting closer, encourage them without specifying which parts are correct
+The user message gives the target word, the player's guess and their previous guesses."""
+
+SYSTEM_MESSAGE = {"role": "system", "content": HINT_RULES}
+
+# Prompt token budget per hint call, and how many previous guesses to include
+PROMPT_BUDGET = int(os.getenv('HINT_PROMPT_BUDGET', 300))
+RECENT_GUESSES = int(os.getenv('HINT_RECENT_GUESSES', 8))
+
+PROMPT_TOKENS = REGISTRY.histogram(
+    "hint_prompt_tokens", "Hint prompt size in tokens, by attempt.", ["attempt"],
+    buckets=(100, 150, 200, 225, 250, 275, 300, 400, 600)
+)
+
+
+@lru_cache(maxsize=1)
+def system_tokens() -> int:
+    """Tokens in the fixed system message (counted once, on first use)"""
+    return count_tokens(HINT_RULES, MODEL) + MESSAGE_OVERHEAD
+
+
+BATCH_INSTRUCTIONS = ('Give one hint for each numbered item below, following the rules for each one. '
+                      'Respond with JSON only: {"hints": ["hint for item 1", "hint for item 2", ...]}')
+
+
+class PromptTooLarge(ValueError):
+    """Raised when a prompt doesn't fit the budget even with an empty guess and no previous guesses."""
+
+
+def hint_request(word: str, guess: str, previous: Sequence[str]) -> str:
+    """The variable part of the hint prompt"""
+    lines = [f"Word: {word}", f"Guess: {guess}"]
+    if previous:
+        lines.append("Previous: " + ", ".join(previous))
+    return "\n".join(lines)
+
+
+def previous_guesses(guess: str, guesses: Sequence[str]) -> List[str]:
+    """The most recent previous guesses, oldest first, without repeats or the current guess"""
+    return list(dict.fromkeys(g for g in reversed(guesses) if g != guess))[:RECENT_GUESSES][::-1]
+
+
+def prompt_tokens(request: str) -> int:
+    """Tokens in the hint prompt with this user message"""
+    return system_tokens() + count_tokens(request, MODEL) + MESSAGE_OVERHEAD + 2
+
+
+def fit_guess(word: str, guess: str) -> str:
+    """The longest start of the guess whose prompt fits the budget on its own"""
+    if prompt_tokens(hint_request(word, "", [])) > PROMPT_BUDGET:
+        raise PromptTooLarge(f"Hint prompt for '{word}' doesn't fit the budget of {PROMPT_BUDGET} tokens")
+    low, high = 0, len(guess)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if prompt_tokens(hint_request(word, guess[:middle], [])) <= PROMPT_BUDGET:
+            low = middle
+        else:
+            high = middle - 1
+    return guess[:low]
+
+
+def fit_request(word: str, guess: str, guesses: Sequence[str]) -> Tuple[str, int]:
+    """The hint request for a guess trimmed to the prompt budget, and the prompt's tokens"""
+    previous = previous_guesses(guess, guesses)
+    while True:
+        request = hint_request(word, guess, previous)
+        tokens = prompt_tokens(request)
+        if tokens <= PROMPT_BUDGET:
+            return request, tokens
+        if previous:
+            previous.pop(0)
+        else:
+            # Only the guess itself is left to cut
+            guess = fit_guess(word, guess)
+
+
+def compile_hint_prompt(word: str, guess: str, guesses: Sequence[str], attempt: int) -> List[Dict[str, str]]:
+    """Build the hint messages for a guess, trimmed to the prompt budget"""
+    request, tokens = fit_request(word, guess, guesses)
+    PROMPT_TOKENS.observe(tokens, attempt)
+    return [SYSTEM_MESSAGE, {"role": "user", "content": request}]
+
+
+def compile_batch_hint_prompt(items: Sequence[Tuple[str, str, Sequence[str]]]) -> List[Dict[str, str]]:
+    """
+    Build one prompt asking for a hint for each (word, guess, guesses) item.
+    The system message is the same fixed rules prefix as for single hints, and
+    each item is trimmed to the same budget as a single hint prompt.
+    """
+    requests = []
+    for i, (word, guess, guesses) in enumerate(items, 1):
+        requests.append(f"{i}.\n" + fit_request(word, guess, guesses)[0])
+    return [SYSTEM_MESSAGE, {"role": "user", "content": BATCH_INSTRUCTIONS + "\n\n" + "\n\n".join(requests)}]
@@ -1,5 +1,64 @@
 let gameActive = false;
 
+// One WebSocket per page carries every action as a small JSON frame;
+// the REST routes are used whenever it isn't open
+const gameSocket = {
+    ws: null,
+    nextId: 1,
+    pending: {},
+
+    connect() {
+        if (!('WebSocket' in window)) return;
+        const scheme = location.protocol === 'https:' ? 'wss://' : 'ws://';
+        const ws = new WebSocket(scheme + location.host + '/ws');
+        let opened = false;
+        ws.onopen = () => { opened = true; };
+        ws.onmessage = event => {
+            const frame = JSON.parse(event.data);
+            const request = this.pending[frame.id];
+            if (!request) return;
+            if (frame.op === 'token') {
+                if (request.onToken) request.onToken(frame.token);
+            } else {
+                delete this.pending[frame.id];
+                request.resolve(frame);
+            }
+        };
+        ws.onclose = () => {
+            this.ws = null;
+            // A request in flight may or may not have been applied, so it isn't retried
+            Object.values(this.pending).forEach(request => request.resolve({
+                message: 'Connection lost, please try again.',
+                status: 'error'
+            }));
+            this.pending = {};
+            // Reconnect only if the server supports WebSockets at all
+            if (opened) setTimeout(() => this.connect(), 1000);
+        };
+        this.ws = ws;
+    },
+
+    isOpen() {
+        return this.ws !== null && this.ws.readyState === WebSocket.OPEN;
+    },
+
+    request(op, payload, onToken) {
+        const id = this.nextId++;
+        return new Promise(resolve => {
+            this.pending[id] = { resolve: resolve, onToken: onToken };
+            this.ws.send(JSON.stringify(Object.assign({ op: op, id: id }, payload)));
+        });
+    }
+};
+
+function gameAction(op, url) {
+    // Send a control action over the socket, or POST it to its REST route
+    if (gameSocket.isOpen()) {
+        return gameSocket.request(op, {});
+    }
+    return fetch(url, { method: 'POST' }).then(response => response.json());
+}
+
 function updateAttempts(count) {
     document.getElementById('attempts-count').textContent = count;
 }
@@ -7,8 +66,7 @@ function updateAttempts(count) {
 function startNewGame() {
     if (gameActive) {
         // If game is active, first reveal the answer
-        fetch('/reveal-word', { method: 'POST' })
-            .then(response => response.json())
+        gameAction('reveal', '/reveal-word')
             .then(data => {
                 addMessage(data.message, 'ai');
                 clearMessages();
@@ -21,8 +79,7 @@ function startNewGame() {
 }
 
 function startNewGameFlow() {
-    fetch('/start-game', { method: 'POST' })
-        .then(response => response.json())
+    gameAction('start', '/start-game')
         .then(data => {
             addMessage(data.message, 'ai');
             document.getElementById('guess-input').disabled = false;
@@ -33,8 +90,7 @@ function startNewGameFlow() {
 }
 
 function exitGame() {
-    fetch('/exit-game', { method: 'POST' })
-        .then(response => response.json())
+    gameAction('exit', '/exit-game')
         .then(data => {
             addMessage(data.message, 'ai');
             document.getElementById('guess-input').disabled = true;
@@ -52,25 +108,91 @@ function makeGuess() {
     addMessage(guess, 'user');
     guessInput.value = '';
 
-    fetch('/make-guess', {
+    // Stream the reply token by token; the final reply carries the game state
+    let messageDiv = null;
+    function onToken(token) {
+        if (!messageDiv) {
+            messageDiv = addMessage('', 'ai');
+        }
+        messageDiv.textContent += token;
+        const chatContainer = document.getElementById('chat-container');
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    }
+    function onDone(data) {
+        if (messageDiv) {
+            messageDiv.textContent = data.message;
+        } else {
+            addMessage(data.message, 'ai');
+        }
+        if (data.attempts_made !== undefined) {
+            updateAttempts(data.attempts_made);
+        }
+        if (data.game_over) {
+            document.getElementById('guess-input').disabled = true;
+            document.getElementById('guess-button').disabled = true;
+            gameActive = false;
+        }
+    }
+
+    if (gameSocket.isOpen()) {
+        gameSocket.request('guess', { guess: guess }, onToken).then(onDone);
+    } else {
+        streamEvents('/make-guess/stream', { guess: guess }, function(event, data) {
+            if (event === 'done') {
+                onDone(data);
+            } else {
+                onToken(data.token);
+            }
+        });
+    }
+}
+
+function streamEvents(url, body, onEvent) {
+    // Minimal Server-Sent Events reader for POST requests (EventSource only supports GET)
+    return fetch(url, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ guess: guess })
+        body: JSON.stringify(body)
     })
-    .then(response => response.json())
-    .then(data => {
-        addMessage(data.message, 'ai');
-        updateAttempts(data.attempts_made);
-        if (data.game_over) {
-            document.getElementById('guess-input').disabled = true;
-            document.getElementById('guess-button').disabled = true;
-            gameActive = false;
+    .then(response => {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        function read() {
+            return reader.read().then(({ done, value }) => {
+                if (done) return;
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const chunk = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    let event = 'message';
+                    let data = '';
+                    chunk.split('\n').forEach(line => {
+                        if (line.startsWith('event: ')) event = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    });
+                    if (data) onEvent(event, JSON.parse(data));
+                }
+                return read();
+            });
         }
+        return read();
     });
 }
 
+function requestHint() {
+    if (!gameActive) return;
+
+    gameAction('hint', '/get-hint')
+        .then(data => {
+            addMessage(data.message, 'ai');
+        });
+}
+
 function addMessage(message, type) {
     const chatContainer = document.getElementById('chat-container');
     const messageDiv = document.createElement('div');
@@ -78,6 +200,7 @@ function addMessage(message, type) {
     messageDiv.textContent = message;
     chatContainer.appendChild(messageDiv);
     chatContainer.scrollTop = chatContainer.scrollHeight;
+    return messageDiv;
 }
 
 function clearMessages() {
@@ -92,6 +215,8 @@ document.getElementById('guess-input').addEventListener('keypress', function(e)
     }
 });
 
+gameSocket.connect();
+
 // Start game automatically when page loads
 document.addEventListener('DOMContentLoaded', function() {
     startNewGame();
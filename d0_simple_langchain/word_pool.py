@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, List, Optional
+
+
+class RecentWords:
+    """
+    Ordered window of recently used words.
+
+    Membership checks are O(1) and, once the window holds ``horizon`` words,
+    adding a new one evicts the oldest.
+    """
+
+    def __init__(self, horizon: int = 100):
+        self.horizon = horizon
+        self._words = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, word: str) -> bool:
+        """Record a word; returns False if it is already in the window."""
+        with self._lock:
+            if word in self._words:
+                return False
+            self._words[word] = None
+            if len(self._words) > self.horizon:
+                self._words.popitem(last=False)
+            return True
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._words
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+
+class WordPool:
+    """
+    Bounded pool of ready-to-use words kept topped up by a background worker.
+
+    The worker refills the pool up to the high watermark whenever its depth
+    drops below the low watermark, so start_game can pop a word without
+    waiting on the LLM. ``generate`` returns a batch of new words per call.
+    Words are deduplicated against what is already queued.
+    """
+
+    def __init__(self, generate: Callable[[], List[str]], size: int = 20,
+                 low_watermark: int = 5, high_watermark: Optional[int] = None):
+        self.generate = generate
+        self.size = size
+        self.low_watermark = min(low_watermark, size)
+        self.high_watermark = min(high_watermark or size, size)
+
+        self._words = deque()
+        self._queued = set()
+        self._cond = threading.Condition()
+        self._worker = None
+
+        # Stats
+        self.refills = 0
+        self.refill_errors = 0
+        self.words_generated = 0
+        self.last_refill_latency = 0.0
+        self.total_refill_latency = 0.0
+        self.hits = 0
+        self.fallbacks = 0
+
+    def start(self):
+        """Start the background refill worker (idempotent)."""
+        with self._cond:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._run, name="word-pool", daemon=True)
+            self._worker.start()
+
+    def get(self) -> Optional[str]:
+        """Pop a ready word, or return None if the pool is empty."""
+        self.start()
+        with self._cond:
+            if not self._words:
+                self.fallbacks += 1
+                self._cond.notify()
+                return None
+            word = self._words.popleft()
+            self._queued.discard(word)
+            self.hits += 1
+            if len(self._words) < self.low_watermark:
+                self._cond.notify()
+            return word
+
+    def put(self, word: Optional[str]) -> bool:
+        """Add a word to the pool; returns False if full, empty or a duplicate."""
+        if not word:
+            return False
+        with self._cond:
+            if len(self._words) >= self.size or word in self._queued:
+                return False
+            self._words.append(word)
+            self._queued.add(word)
+            return True
+
+    def depth(self) -> int:
+        return len(self._words)
+
+    def stats(self) -> dict:
+        """Return pool depth, refill latency and fallback counts."""
+        with self._cond:
+            return {
+                "depth": len(self._words),
+                "size": self.size,
+                "low_watermark": self.low_watermark,
+                "high_watermark": self.high_watermark,
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "refills": self.refills,
+                "refill_errors": self.refill_errors,
+                "words_generated": self.words_generated,
+                "last_refill_latency": round(self.last_refill_latency, 4),
+                "avg_refill_latency": round(self.total_refill_latency / self.refills, 4) if self.refills else 0.0
+            }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while len(self._words) >= self.low_watermark:
+                    self._cond.wait()
+            self._refill()
+
+    def _refill(self):
+        # Stop after a run of failures so a broken API doesn't spin the worker
+        misses = 0
+        while self.depth() < self.high_watermark and misses < 3:
+            started = time.perf_counter()
+            try:
+                words = self.generate()
+            except Exception as e:
+                print(f"Error refilling word pool: {str(e)}")
+                words = None
+            elapsed = time.perf_counter() - started
+
+            with self._cond:
+                self.refills += 1
+                self.last_refill_latency = elapsed
+                self.total_refill_latency += elapsed
+                if words is None:
+                    self.refill_errors += 1
+                else:
+                    self.words_generated += len(words)
+
+            added = sum(self.put(word) for word in words or [])
+            if added:
+                misses = 0
+            else:
+                misses += 1
+
+        if misses >= 3:
+            # Back off before the next attempt
+            time.sleep(1.0)
@@ -1,8 +1,18 @@
-from typing import TypedDict, List, Optional
+import os
+from typing import Annotated, TypedDict, List, Optional
+
+# Number of recent messages kept in the game state
+MEMORY_MESSAGES = int(os.getenv('MEMORY_MESSAGES', 6))
+
+def keep_recent(left: List[dict], right: List[dict]) -> List[dict]:
+    """Reducer that appends new messages and keeps only the most recent ones."""
+    return (left + right)[-MEMORY_MESSAGES:]
 
 class GameState(TypedDict):
     """State definition for the word guessing game."""
-    messages: List[dict]  # Chat history
+    messages: Annotated[List[dict], keep_recent]  # Recent chat history (nodes return only new messages)
+    summary: str  # Compact running summary of the whole game
+    tokens_sent: int  # Prompt tokens sent on the last LLM call
     attempts: int  # Number of attempts made
     current_word: Optional[str]  # The word to guess
     game_active: bool  # Whether the game is currently active
@@ -12,6 +22,8 @@ def create_initial_state() -> GameState:
     """Create initial game state."""
     return {
         "messages": [],
+        "summary": "",
+        "tokens_sent": 0,
         "attempts": 0,
         "current_word": None,
         "game_active": False,
@@ -20,4 +32,22 @@ def create_initial_state() -> GameState:
 
 def update_state(state: GameState, updates: dict) -> GameState:
     """Update game state with new values."""
-    return {**state, **updates} 
\ No newline at end of file
+    return {**state, **updates} 
+
+class GameSession:
+    """A player's session: the checkpointer thread of their current game and their word sampler."""
+    __slots__ = ("thread_id", "sampler")
+
+    def __init__(self):
+        self.thread_id = None
+        self.sampler = None
+
+    def to_record(self):
+        """Persisted form of the session; the sampler is recreated on the next game."""
+        return self.thread_id
+
+    @classmethod
+    def from_record(cls, record):
+        session = cls()
+        session.thread_id = record
+        return session
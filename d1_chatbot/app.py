@@ -1,9 +1,23 @@
-from flask import Flask, jsonify, render_template, request
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, jsonify, request
 from dotenv import load_dotenv
 import os
 from pathlib import Path
-from .agent_state import create_initial_state, update_state
-from .graph_setup import create_game_graph
+from common.lexicon import load_lexicon
+from common.session_store import SessionStore, new_session_id
+from common.persistence import SessionDB, sqlite_checkpointer
+from common.flask_sessions import init_sessions, session_id
+from common.flask_metrics import init_metrics
+from common.flask_ws import init_websocket
+from common.event_log import GIVE_UP, LIMIT, MISS, WIN, event_log_from_env
+from common.answer_match import is_correct
+from common.static_assets import cached_template, init_static_assets
+from common.metrics import register_collector
+from common.sse import SSE_HEADERS, sse_event
+from .agent_state import GameSession, create_initial_state
+from .graph_setup import HUMAN, create_game_graph
 
 # Get the root directory (parent of d1_chatbot)
 root_dir = Path(__file__).parent.parent
@@ -13,88 +27,192 @@ load_dotenv(root_dir / '.env')
 
 # Initialize Flask app
 app = Flask(__name__)
+init_sessions(app)
+init_metrics(app)
+init_static_assets(app)
 
-# Initialize game graph
-game_graph = create_game_graph()
+# The game page is rendered once and served from memory
+index_page = cached_template('index.html')
 
-# Global game state
-game_state = create_initial_state()
+# With GAME_DB set, sessions and game checkpoints are persisted to SQLite
+game_db_path = os.getenv('GAME_DB')
+game_db = SessionDB(game_db_path, GameSession.to_record, GameSession.from_record) if game_db_path else None
+
+# Game graph (each game runs as a thread on its checkpointer), built on first use
+_game_graph = None
+_game_graph_lock = threading.Lock()
+
+def get_game_graph():
+    """Return the compiled game graph, building it on first use."""
+    global _game_graph
+    if _game_graph is None:
+        with _game_graph_lock:
+            if _game_graph is None:
+                _game_graph = create_game_graph(sqlite_checkpointer(game_db_path) if game_db_path else None)
+    return _game_graph
+
+def forget_game(thread_id):
+    """Drop a finished or abandoned game's checkpoints."""
+    if _game_graph is None:
+        return
+    checkpointer = _game_graph.checkpointer
+    if thread_id and hasattr(checkpointer, "delete_thread"):
+        checkpointer.delete_thread(thread_id)
+
+# Live games, keyed by the player's session cookie
+sessions = SessionStore(
+    GameSession,
+    max_sessions=int(os.getenv('MAX_SESSIONS', 10000)),
+    ttl=float(os.getenv('SESSION_TTL', 1800)),
+    # Persisted games outlive the in-memory cache entry
+    on_evict=None if game_db else lambda sid, session: forget_game(session.thread_id),
+    backing=game_db
+)
+
+register_collector("sessions", sessions.stats)
+
+# Append-only record of starts, guesses and outcomes (GAME_EVENT_LOG)
+event_log = event_log_from_env()
+if event_log:
+    register_collector("event_log", event_log.stats)
+
+def log_event(kind, **fields):
+    if event_log:
+        event_log.record(kind, **fields)
+
+def game_config(session: GameSession) -> dict:
+    """Graph config for the session's current game."""
+    return {"configurable": {"thread_id": session.thread_id, "word_sampler": session.sampler}}
 
 @app.route('/')
 def home():
     """Render the game interface."""
-    return render_template('index.html')
+    # Assign the session now, so the WebSocket handshake carries its cookie
+    session_id()
+    return index_page.response()
+
+def begin_game(sid: str) -> dict:
+    """Start a new game for the session and return the response payload."""
+    # Turns run the model, so they are serialized per player rather than under the
+    # session's stripe lock, which would also block every player sharing it
+    with sessions.turn_lock(sid):
+        with sessions.locked(sid, create=True) as session:
+            if session.sampler is None:
+                session.sampler = load_lexicon().sampler()
+            previous = session.thread_id
+            session.thread_id = new_session_id()
+            sessions.save(sid, session)
+        forget_game(previous)
+        
+        # Run the graph from start node; it stops before the player's turn
+        result = get_game_graph().invoke(create_initial_state(), game_config(session))
+    
+    log_event("start", g=sid, w=result["current_word"])
+    return {
+        "message": result["messages"][-1]["content"],
+        "status": "success",
+        "attempts_made": result["attempts"]
+    }
 
 @app.route('/start-game', methods=['POST'])
 def start_game():
     """Initialize a new game."""
-    global game_state
-    game_state = create_initial_state()
-    
-    # Run the graph from start node
-    result = game_graph.invoke(game_state)
-    game_state = update_state(game_state, result)
+    return jsonify(begin_game(session_id()))
+
+def play_turn(sid: str, guess: str, emit=None) -> dict:
+    """
+    Advance the player's game by exactly one turn and return the response payload.
+    With ``emit``, the model's reply is streamed to it token by token as well.
+    """
+    with sessions.turn_lock(sid):
+        session = sessions.get(sid)
+        config = game_config(session) if session and session.thread_id else None
+        if config and emit:
+            config["configurable"]["emit"] = emit
+        game_graph = get_game_graph()
+        snapshot = game_graph.get_state(config) if config else None
+        if not snapshot or not snapshot.next:
+            return {
+                "message": "Please start a new game first!",
+                "status": "error",
+                "attempts_made": snapshot.values.get("attempts", 0) if snapshot else 0
+            }
+        
+        # Add the player's message as the human turn, then run the chatbot once
+        game_graph.update_state(config, {"messages": [{"role": "user", "content": guess}]}, as_node=HUMAN)
+        result = game_graph.invoke(None, config)
     
-    return jsonify({
+    log_event("guess", g=sid, w=result["current_word"], n=result["attempts"], r=guess_outcome(guess, result))
+    return {
         "message": result["messages"][-1]["content"],
         "status": "success",
-        "attempts_made": game_state["attempts"]
-    })
+        "game_over": not result["game_active"],
+        "attempts_made": result["attempts"]
+    }
+
+def guess_outcome(guess: str, result: dict) -> str:
+    """Event log outcome of a turn, checked in the same order as chatbot_node."""
+    if result["game_active"]:
+        return MISS
+    if is_correct(result["current_word"] or "", guess):
+        return WIN
+    if guess in ['i give up', 'give up', 'giveup']:
+        return GIVE_UP
+    return LIMIT
 
 @app.route('/make-guess', methods=['POST'])
 def make_guess():
     """Process a player's guess."""
-    global game_state
-    
-    if not game_state["game_active"]:
-        return jsonify({
-            "message": "Please start a new game first!",
-            "status": "error",
-            "attempts_made": game_state["attempts"]
-        })
-    
     guess = request.json.get('guess', '').lower().strip()
-    game_state["messages"].append({"role": "user", "content": guess})
+    return jsonify(play_turn(session_id(), guess))
+
+# Streamed turns run here while the request thread relays their tokens
+stream_pool = ThreadPoolExecutor(max_workers=int(os.getenv('STREAM_WORKERS', 32)), thread_name_prefix='stream-turn')
+
+@app.route('/make-guess/stream', methods=['POST'])
+def make_guess_stream():
+    """Process a player's guess, streaming the reply as Server-Sent Events."""
+    guess = request.json.get('guess', '').lower().strip()
+    # The turn runs on its own thread, so a client that disconnects
+    # mid-stream still leaves the game consistent
+    tokens = queue.Queue()
+    turn = stream_pool.submit(play_turn, session_id(), guess, tokens.put)
+    turn.add_done_callback(lambda _: tokens.put(None))
     
-    # Run the graph
-    result = game_graph.invoke(game_state)
-    game_state = update_state(game_state, result)
+    def events():
+        for token in iter(tokens.get, None):
+            yield sse_event({"token": token})
+        yield sse_event(turn.result(), "done")
     
-    # Check for game end conditions
-    game_over = False
-    if guess == game_state["current_word"]:
-        message = f"Congratulations! You've won! The word was '{game_state['current_word']}'!"
-        game_state["game_active"] = False
-        game_over = True
-    elif game_state["attempts"] >= game_state["max_attempts"]:
-        message = f"Game Over! You've reached {game_state['max_attempts']} attempts. The word was '{game_state['current_word']}'."
-        game_state["game_active"] = False
-        game_over = True
-    elif guess.lower() in ['i give up', 'give up', 'giveup']:
-        message = f"The word was '{game_state['current_word']}'. Don't worry, try another round!"
-        game_state["game_active"] = False
-        game_over = True
-    else:
-        message = result["messages"][-1]["content"]
+    return Response(events(), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+def end_game(sid: str) -> dict:
+    """End the session's game and return the response payload."""
+    # Waits for a turn in progress, so its checkpoints aren't written after they are dropped
+    with sessions.turn_lock(sid):
+        session = sessions.discard(sid)
+        word = None
+        if session and session.thread_id:
+            word = get_game_graph().get_state(game_config(session)).values.get("current_word")
+            forget_game(session.thread_id)
     
-    return jsonify({
-        "message": message,
-        "status": "success",
-        "game_over": game_over,
-        "attempts_made": game_state["attempts"]
-    })
+    return {
+        "message": f"Thanks for playing! The word was '{word}'. Goodbye!" if word else "Thanks for playing! Goodbye!",
+        "status": "success"
+    }
 
 @app.route('/exit-game', methods=['POST'])
 def exit_game():
     """End the current game."""
-    global game_state
-    word = game_state["current_word"]
-    game_state = create_initial_state()
-    
-    return jsonify({
-        "message": f"Thanks for playing! The word was '{word}'. Goodbye!" if word else "Thanks for playing! Goodbye!",
-        "status": "success"
-    })
+    return jsonify(end_game(session_id()))
+
+# Persistent per-page channel for the same actions (see common/flask_ws.py);
+# a guess streams the model's reply as token frames before the reply frame
+init_websocket(app, {
+    "start": lambda sid, frame, emit: begin_game(sid),
+    "guess": lambda sid, frame, emit: play_turn(sid, str(frame.get('guess', '')).lower().strip(), emit),
+    "exit": lambda sid, frame, emit: end_game(sid)
+})
 
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -1,9 +1,16 @@
 """
 Generate workflow visualization for the Word Guessing Game.
-This script runs the save_workflow_visualization function from graph_setup.py
+This script runs the save_workflow_visualization function from graph_setup.py;
+pass --force to render again even when the cached diagram is up to date.
 """
 
+import sys
+from pathlib import Path
+
+# Make the shared ``common`` package importable when run from d1_chatbot/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 from graph_setup import save_workflow_visualization
 
 if __name__ == "__main__":
-    save_workflow_visualization() 
\ No newline at end of file
+    save_workflow_visualization(force="--force" in sys.argv[1:])
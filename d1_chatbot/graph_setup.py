@@ -1,60 +1,141 @@
-from langgraph.graph import StateGraph, END, START
+import hashlib
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
 from agent_state import GameState
 from nodes import chatbot_node
 
-# Define constant for chatbot node
+# Node names
 CHATBOT = "chatbot"
+HUMAN = "human"
+
+# The workflow diagram lives next to this module, with the hashes it was rendered from
+VISUALIZATION_PATH = Path(__file__).parent / "workflow_graph.png"
+VISUALIZATION_KEY_PATH = VISUALIZATION_PATH.with_suffix(".json")
+
+def human_node(state: GameState) -> dict:
+    """Placeholder for the player's turn; the graph is interrupted before it runs."""
+    return {}
+
+def create_game_graph(checkpointer=None):
+    """
+    Create and configure the game workflow graph.
 
-def create_game_graph():
-    """Create and configure the game workflow graph with a Chatbot node."""
+    Each game is a checkpointer thread. The graph is interrupted before HUMAN,
+    so one invoke runs the chatbot exactly once and then waits for the player:
+    the app adds the player's message with update_state(..., as_node=HUMAN)
+    and resumes with invoke(None, config).
+    """
+    # Imported here so the app starts without loading LangGraph
+    from langgraph.graph import StateGraph, END, START
+    from langgraph.checkpoint.memory import MemorySaver
+    
     # Create the graph
     workflow = StateGraph(GameState)
     
-    # Add chatbot node
+    # Add nodes
     workflow.add_node(CHATBOT, chatbot_node)
+    workflow.add_node(HUMAN, human_node)
     
-    # Add edges - from START to chatbot, and from chatbot to END
+    # START -> chatbot (sets up the game), human -> chatbot (answers a guess)
     workflow.add_edge(START, CHATBOT)
-    workflow.add_edge(CHATBOT, END)
+    workflow.add_edge(HUMAN, CHATBOT)
     
-    # Add conditional edge for chatbot to continue processing
+    # After the chatbot, wait for the player while the game is active
     def router(state: GameState) -> str:
-        return END if not state["game_active"] else CHATBOT
+        return HUMAN if state["game_active"] else END
     
     workflow.add_conditional_edges(
         CHATBOT,
         router,
         {
-            CHATBOT: CHATBOT,
+            HUMAN: HUMAN,
             END: END
         }
     )
     
-    return workflow.compile()
+    return workflow.compile(
+        checkpointer=checkpointer or MemorySaver(),
+        interrupt_before=[HUMAN]
+    )
+
+def graph_structure(graph) -> dict:
+    """Nodes and edges of a compiled graph, in a stable order."""
+    drawable = graph.get_graph()
+    return {
+        "nodes": sorted(drawable.nodes),
+        "edges": sorted(
+            [edge.source, edge.target, bool(getattr(edge, "conditional", False))]
+            for edge in drawable.edges
+        )
+    }
 
-def save_workflow_visualization():
+def structure_hash(structure: dict) -> str:
+    return hashlib.sha256(json.dumps(structure, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def workflow_dot(structure: dict) -> str:
+    """Graphviz DOT source for the workflow; conditional edges are dashed."""
+    labels = {"__start__": "START", "__end__": "END"}
+    lines = [
+        "digraph workflow {",
+        '    node [shape=box, style="rounded,filled", fillcolor="#e3f2fd", fontname="Helvetica"];'
+    ]
+    for node in structure["nodes"]:
+        shape = ', shape=oval, fillcolor="#e8f5e9"' if node in labels else ""
+        lines.append(f'    "{node}" [label="{labels.get(node, node)}"{shape}];')
+    for source, target, conditional in structure["edges"]:
+        lines.append(f'    "{source}" -> "{target}"' + (" [style=dashed];" if conditional else ";"))
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+def render_dot(dot: str, path: Path) -> Path:
+    """
+    Render DOT source to a PNG with the local Graphviz ``dot`` binary.
+    Without Graphviz, the DOT source is written instead (render it with any
+    Graphviz viewer); returns the path written.
+    """
+    executable = shutil.which("dot")
+    if executable is None:
+        path = path.with_suffix(".dot")
+        path.write_text(dot)
+        return path
+    png = subprocess.run([executable, "-Tpng"], input=dot.encode("utf-8"), capture_output=True, check=True).stdout
+    path.write_bytes(png)
+    return path
+
+def save_workflow_visualization(force: bool = False) -> Path:
     """
-    Create and save a visualization of the workflow using Mermaid.
-    This visualization exactly matches the graph structure in create_game_graph:
+    Render the workflow of create_game_graph to workflow_graph.png next to this module:
     1. START -> CHATBOT (initial edge)
-    2. CHATBOT -> END (direct edge)
-    3. CHATBOT -> CHATBOT (conditional edge when game_active is True)
+    2. CHATBOT -> HUMAN (conditional edge when game_active is True; interrupted here)
+    3. CHATBOT -> END (conditional edge when the game is over)
+    4. HUMAN -> CHATBOT (player's guess)
+
+    Rendering is local (Graphviz), never a remote service. The diagram is cached
+    by the hash of the compiled graph's nodes and edges: when this module's source
+    is unchanged the graph isn't even built, and when it changed without changing
+    the structure the existing diagram is kept.
     """
-    # Create and compile the graph
-    graph = create_game_graph()
-    
+    source = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
     try:
-        # Get the Mermaid graph representation
-        mermaid_graph = graph.get_graph()
-        
-        # Save the Mermaid graph as PNG
-        png_data = mermaid_graph.draw_mermaid_png()
-        
-        # Write the PNG data to a file
-        with open('workflow_graph.png', 'wb') as f:
-            f.write(png_data)
-            
-        print("Graph visualization saved as workflow_graph.png")
-    except Exception as e:
-        print(f"Error saving graph visualization: {str(e)}")
-        print("Note: Mermaid visualization requires additional dependencies")
+        cached = json.loads(VISUALIZATION_KEY_PATH.read_text())
+    except (OSError, ValueError):
+        cached = {}
+    output = VISUALIZATION_PATH.with_name(cached.get("output", VISUALIZATION_PATH.name))
+    if not force and cached.get("source") == source and output.exists():
+        print(f"Graph visualization is up to date: {output}")
+        return output
+
+    structure = graph_structure(create_game_graph())
+    structure_key = structure_hash(structure)
+    if force or cached.get("structure") != structure_key or not output.exists():
+        output = render_dot(workflow_dot(structure), VISUALIZATION_PATH)
+        print(f"Graph visualization saved as {output}")
+    else:
+        print(f"Graph structure unchanged, keeping {output}")
+
+    VISUALIZATION_KEY_PATH.write_text(json.dumps(
+        {"source": source, "structure": structure_key, "output": output.name}, indent=2) + "\n")
+    return output
@@ -0,0 +1,50 @@
+import os
+from typing import Dict, List, Tuple
+from common.tokens import count_message_tokens
+
+SUMMARY_PREFIX = "Earlier guesses: "
+# Older guesses kept in the summary, and the characters kept of each
+SUMMARY_GUESSES = int(os.getenv('SUMMARY_GUESSES', 20))
+SUMMARY_GUESS_CHARS = 30
+
+def summarize(summary: str, dropped: List[dict]) -> str:
+    """
+    Fold the player's guesses among ``dropped`` (messages leaving the recent
+    window) into the running summary. Only the last SUMMARY_GUESSES guesses
+    are kept, each cut to SUMMARY_GUESS_CHARS, so the summary stays bounded.
+    """
+    guesses = [
+        m["content"].strip().lower().replace(",", " ")[:SUMMARY_GUESS_CHARS]
+        for m in dropped if m["role"] == "user"
+    ]
+    if not guesses:
+        return summary
+    earlier = summary[len(SUMMARY_PREFIX):].split(", ") if summary else []
+    return SUMMARY_PREFIX + ", ".join((earlier + guesses)[-SUMMARY_GUESSES:])
+
+class ConversationMemory:
+    """
+    Prompt assembly for the chatbot: the recent-message window kept in the
+    game state (see agent_state.keep_recent) plus a compact running summary
+    of the whole game, trimmed oldest-first to fit a token budget.
+    """
+
+    def __init__(self, token_budget: int = None, model: str = "gpt-3.5-turbo"):
+        self.token_budget = token_budget or int(os.getenv('PROMPT_TOKEN_BUDGET', 400))
+        self.model = model
+
+    def build_prompt(self, system: str, state: dict) -> Tuple[List[Dict[str, str]], int]:
+        """Return (messages, prompt tokens) for the next call."""
+        head = [{"role": "system", "content": system}]
+        if state.get("summary"):
+            head.append({"role": "system", "content": state["summary"]})
+        recent = list(state["messages"])
+        
+        # Drop the oldest recent messages until the prompt fits, always keeping the latest
+        messages = head + recent
+        tokens = count_message_tokens(messages, self.model)
+        while tokens > self.token_budget and len(recent) > 1:
+            recent.pop(0)
+            messages = head + recent
+            tokens = count_message_tokens(messages, self.model)
+        return messages, tokens
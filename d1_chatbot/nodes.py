@@ -1,72 +1,125 @@
-from openai import OpenAI
 import os
-import random
-from typing import List, Dict
-from agent_state import GameState
+from typing import Callable, Dict, Optional, Tuple
+from agent_state import MEMORY_MESSAGES, GameState
+from common import llm
+from common.lexicon import LexiconSampler, load_lexicon
+from common.local_hints import local_hint
+from common.answer_match import answer_matcher, is_correct
+from common.metrics import register_collector
+from common.resilience import Unavailable, guard_from_env
+from memory import ConversationMemory, summarize
 
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+SYSTEM_PROMPT = "You are a friendly word guessing game host. Never reveal the word unless the player explicitly says 'I give up'. Provide clever hints about the word's category, size, or common uses without directly confirming if any part of the guess is correct."
 
-def get_random_word() -> str:
-    """Return a random word for the game."""
-    # For now, return a fixed word. Later we can expand this.
-    return "python"
+memory = ConversationMemory()
 
-def chatbot_node(state: GameState) -> Dict:
+# Bounds model reply latency; when the model can't answer in time, replies come from local hints
+reply_guard = guard_from_env("HINT", failure_types=(llm.ProviderError,))
+register_collector("reply_guard", reply_guard.stats)
+register_collector("reply_breaker", reply_guard.breaker.stats)
+# Streamed replies: the first token is due within HINT_TIMEOUT, the whole reply within this
+REPLY_STREAM_TIMEOUT = float(os.getenv('HINT_STREAM_TIMEOUT', 15))
+
+def get_random_word(sampler: Optional[LexiconSampler] = None) -> str:
+    """Return a random word for the game from the local lexicon."""
+    # A per-session sampler avoids repeating words for the same player
+    if sampler is not None:
+        return sampler.next_word()
+    return load_lexicon().random_word()
+
+def chatbot_node(state: GameState, config: Optional[dict] = None) -> Dict:
     """
     Chatbot node that handles game initialization, interactions, and decisions.
     Acts as an LLM that manages the game flow and player interactions.
+    Runs once per turn and returns only the state updates for that turn.
     """
     # If game not initialized, set it up
     if not state.get("current_word"):
+        sampler = (config or {}).get("configurable", {}).get("word_sampler")
+        word = get_random_word(sampler)
+        # Precompute the accepted spellings so guesses are matched with a set lookup
+        answer_matcher(word)
         return {
-            "current_word": get_random_word(),
+            "current_word": word,
             "game_active": True,
             "messages": [{"role": "assistant", "content": "Hi! I'm your word guessing game host. I've picked a word. Try to guess it!"}]
         }
     
     # Get the last user message
     last_message = state["messages"][-1]
+    if last_message["role"] != "user":
+        return {}
     
-    # If it's a user message, process it
-    if last_message["role"] == "user":
-        guess = last_message["content"].strip().lower()
-        word = state["current_word"].lower()
-        
-        # Generate appropriate response based on the guess
-        if guess == word:
-            state["messages"].append({
-                "role": "assistant",
-                "content": f"Congratulations! You've guessed the word '{word}' correctly!"
-            })
-            state["game_active"] = False
-        else:
-            # Here we could add more sophisticated hint generation
-            hint = "The word is shorter" if len(guess) > len(word) else "The word is longer" if len(guess) < len(word) else "Same length, but not correct"
-            state["messages"].append({
-                "role": "assistant",
-                "content": f"Not quite right. Here's a hint: {hint}"
-            })
+    guess = last_message["content"].strip().lower()
+    word = state["current_word"].lower()
+    attempts = state["attempts"] + 1
+    tokens = 0
     
-    return state
-
-def process_guess(state: GameState) -> Dict:
-    """Process chat messages and return response."""
-    messages = [
-        {"role": "system", "content": "You are a friendly word guessing game host. Never reveal the word unless the player explicitly says 'I give up'. Provide clever hints about the word's category, size, or common uses without directly confirming if any part of the guess is correct."},
-        *state["messages"][-5:]  # Keep last 5 messages for context
-    ]
+    # Generate appropriate response based on the guess
+    # Plurals, articles and small misspellings of the word count as correct
+    if is_correct(word, guess):
+        content = f"Congratulations! You've won! The word was '{word}'!"
+        game_active = False
+    elif guess in ['i give up', 'give up', 'giveup']:
+        content = f"The word was '{word}'. Don't worry, try another round!"
+        game_active = False
+    elif attempts >= state["max_attempts"]:
+        content = f"Game Over! You've reached {state['max_attempts']} attempts. The word was '{word}'."
+        game_active = False
+    else:
+        # With an "emit" callback in the config (SSE and WebSocket guesses) the reply is streamed through it
+        emit = (config or {}).get("configurable", {}).get("emit")
+        content, tokens = hint_reply(state, word, guess, attempts, emit)
+        game_active = True
     
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=messages,
-        temperature=0.7
-    )
+    # Messages leaving the recent window are folded into the summary. The next
+    # guess pushes the oldest one out before this node runs again, so it is folded now.
+    reply = {"role": "assistant", "content": content}
+    window = state["messages"] + [reply]
+    dropped = window[:-max(1, MEMORY_MESSAGES - 1)]
     
     return {
-        "messages": [{"role": "assistant", "content": response.choices[0].message.content}],
-        "attempts": state["attempts"] + 1
+        "messages": [reply],
+        "summary": summarize(state.get("summary", ""), dropped),
+        "tokens_sent": tokens,
+        "attempts": attempts,
+        "game_active": game_active
     }
 
+def hint_reply(state: GameState, word: str, guess: str, attempts: int,
+               emit: Optional[Callable[[str], None]] = None) -> Tuple[str, int]:
+    """
+    The model's reply to a wrong guess and its prompt tokens; a local hint when the model can't answer.
+    With ``emit``, the reply is streamed and each token is passed to it as it arrives.
+    """
+    # Recent messages plus the running summary, within the prompt token budget
+    system = f"{SYSTEM_PROMPT} The word is '{word}'."
+    messages, tokens = memory.build_prompt(system, state)
+    
+    try:
+        if emit is None:
+            return reply_guard.call(lambda: llm.chat(
+                messages,
+                model="gpt-3.5-turbo",
+                temperature=0.7,
+                single_flight=False
+            )), tokens
+        reply = []
+        stream = reply_guard.stream(
+            lambda: llm.stream(messages, model="gpt-3.5-turbo", temperature=0.7),
+            total=REPLY_STREAM_TIMEOUT
+        )
+        try:
+            for token in stream:
+                reply.append(token)
+                emit(token)
+        finally:
+            stream.close()
+        return "".join(reply), tokens
+    except Unavailable:
+        # Tokens already emitted are replaced by the final reply
+        return local_hint(word, guess, attempts), 0
+
 def check_game_status(state: GameState) -> str:
     """Check game status and determine next action."""
     if not state["game_active"]:
@@ -1,79 +1,28 @@
-from typing import Dict, List, Optional, Any, TypedDict, Annotated
-from operator import itemgetter
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_openai import ChatOpenAI
-from langgraph.graph import StateGraph, END
 from dotenv import load_dotenv
 import os
-from datetime import datetime
-from enum import Enum
-from pydantic import BaseModel, Field
+import sys
+import threading
+from pathlib import Path
 from flask import Flask, jsonify, render_template_string, request
 
 # Load environment variables
 load_dotenv()
 
-# Define our state
-class GameState(TypedDict):
-    messages: List[BaseMessage]
-    current_word: Optional[str]
-    attempts: int
-    game_status: str
+# Make the shared ``common`` package importable when run as a script
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
 
-def create_game_graph():
-    # Initialize our LLM
-    llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7)
-    
-    # Create the graph
-    workflow = StateGraph(GameState)
-    
-    # Define the nodes
-    def generate_word(state: GameState) -> GameState:
-        """Generate a new word for the game"""
-        # Implementation here
-        return state
-    
-    def process_guess(state: GameState) -> GameState:
-        """Process the player's guess"""
-        # Implementation here
-        return state
-    
-    def generate_hint(state: GameState) -> GameState:
-        """Generate a hint for the player"""
-        # Implementation here
-        return state
-    
-    # Add nodes
-    workflow.add_node("generate_word", generate_word)
-    workflow.add_node("process_guess", process_guess)
-    workflow.add_node("generate_hint", generate_hint)
-    
-    # Define conditional routing
-    def router(state: GameState) -> str:
-        if state["game_status"] == "ended":
-            return END
-        if state["messages"][-1].content == "hint":
-            return "generate_hint"
-        return "process_guess"
-    
-    # Add edges
-    workflow.set_entry_point("generate_word")
-    workflow.add_edge("generate_word", router)
-    workflow.add_edge("process_guess", router)
-    workflow.add_edge("generate_hint", router)
-    
-    # Compile the graph
-    return workflow.compile()
-
-# Initialize the game
-def init_game() -> GameState:
-    return {
-        "messages": [],
-        "current_word": None,
-        "attempts": 0,
-        "game_status": "ongoing"
-    } 
+from common.flask_sessions import init_sessions, session_id
+from common.flask_metrics import init_metrics
+from common.flask_ws import init_websocket
+from common.event_log import LIMIT, MISS, WIN, event_log_from_env
+from common.hint_ladder import build_ladder, ladder_rung
+from common.local_hints import local_hint
+from common.static_assets import LazyPage
+from common.metrics import register_collector
+from common.session_store import SessionStore, new_session_id
+from common.persistence import SessionDB, sqlite_checkpointer
+from speculation import speculation
 
 # HTML template
 GAME_PAGE = '''
@@ -162,6 +111,66 @@ GAME_PAGE = '''
     <script>
         let gameActive = false;
 
+        // One WebSocket per page carries every action as a small JSON frame;
+        // the REST routes are used whenever it isn't open
+        const gameSocket = {
+            ws: null,
+            nextId: 1,
+            pending: {},
+
+            connect() {
+                if (!('WebSocket' in window)) return;
+                const scheme = location.protocol === 'https:' ? 'wss://' : 'ws://';
+                const ws = new WebSocket(scheme + location.host + '/ws');
+                let opened = false;
+                ws.onopen = () => { opened = true; };
+                ws.onmessage = event => {
+                    const frame = JSON.parse(event.data);
+                    const request = this.pending[frame.id];
+                    if (!request || frame.op === 'token') return;
+                    delete this.pending[frame.id];
+                    request.resolve(frame);
+                };
+                ws.onclose = () => {
+                    this.ws = null;
+                    // A request in flight may or may not have been applied, so it isn't retried
+                    Object.values(this.pending).forEach(request => request.resolve({
+                        message: 'Connection lost, please try again.',
+                        status: 'error'
+                    }));
+                    this.pending = {};
+                    // Reconnect only if the server supports WebSockets at all
+                    if (opened) setTimeout(() => this.connect(), 1000);
+                };
+                this.ws = ws;
+            },
+
+            isOpen() {
+                return this.ws !== null && this.ws.readyState === WebSocket.OPEN;
+            },
+
+            request(op, payload) {
+                const id = this.nextId++;
+                return new Promise(resolve => {
+                    this.pending[id] = { resolve: resolve };
+                    this.ws.send(JSON.stringify(Object.assign({ op: op, id: id }, payload)));
+                });
+            }
+        };
+
+        function gameAction(op, url, payload) {
+            // Send an action over the socket, or POST it to its REST route
+            if (gameSocket.isOpen()) {
+                return gameSocket.request(op, payload || {});
+            }
+            const options = { method: 'POST' };
+            if (payload) {
+                options.headers = { 'Content-Type': 'application/json' };
+                options.body = JSON.stringify(payload);
+            }
+            return fetch(url, options).then(response => response.json());
+        }
+
         function addMessage(message, type) {
             const chatContainer = document.getElementById('chat-container');
             const messageDiv = document.createElement('div');
@@ -176,8 +185,7 @@ GAME_PAGE = '''
         }
 
         function startNewGame() {
-            fetch('/start-game', { method: 'POST' })
-                .then(response => response.json())
+            gameAction('start', '/start-game')
                 .then(data => {
                     addMessage(data.message, 'ai');
                     document.getElementById('guess-input').disabled = false;
@@ -196,14 +204,7 @@ GAME_PAGE = '''
             addMessage(guess, 'user');
             guessInput.value = '';
 
-            fetch('/make-guess', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ guess: guess })
-            })
-            .then(response => response.json())
+            gameAction('guess', '/make-guess', { guess: guess })
             .then(data => {
                 addMessage(data.message, 'ai');
                 updateAttempts(data.attempts);
@@ -218,16 +219,14 @@ GAME_PAGE = '''
         function requestHint() {
             if (!gameActive) return;
             
-            fetch('/get-hint', { method: 'POST' })
-                .then(response => response.json())
+            gameAction('hint', '/get-hint')
                 .then(data => {
                     addMessage(data.message, 'ai');
                 });
         }
 
         function exitGame() {
-            fetch('/exit-game', { method: 'POST' })
-                .then(response => response.json())
+            gameAction('exit', '/exit-game')
                 .then(data => {
                     addMessage(data.message, 'ai');
                     gameActive = false;
@@ -236,6 +235,8 @@ GAME_PAGE = '''
                 });
         }
 
+        gameSocket.connect();
+
         // Enable Enter key to submit
         document.getElementById('guess-input').addEventListener('keypress', function(e) {
             if (e.key === 'Enter') {
@@ -249,59 +250,250 @@ GAME_PAGE = '''
 
 # Flask app
 app = Flask(__name__)
+init_sessions(app)
+init_metrics(app)
+
+class GameSession:
+    """A player's session: the graph thread of their current game and its hint ladder"""
+    __slots__ = ('thread_id', 'hint_ladder', 'hints_given')
+
+    def __init__(self):
+        self.thread_id = None
+        self.hint_ladder = None
+        self.hints_given = 0
+
+    def to_record(self):
+        return [self.thread_id, self.hint_ladder, self.hints_given]
+
+    @classmethod
+    def from_record(cls, record):
+        session = cls()
+        # Records saved before hint ladders are just the thread id
+        if isinstance(record, list):
+            session.thread_id, session.hint_ladder, session.hints_given = record
+        else:
+            session.thread_id = record
+        return session
+
+# With GAME_DB set, sessions and game checkpoints are persisted to SQLite
+game_db_path = os.getenv('GAME_DB')
+game_db = SessionDB(game_db_path, GameSession.to_record, GameSession.from_record) if game_db_path else None
+
+# The graph is built once, on first use (importing LangGraph is slow, so
+# workers start without it); each game is a thread on it
+_game_graph = None
+_game_graph_lock = threading.Lock()
+
+def get_game_graph():
+    global _game_graph
+    if _game_graph is None:
+        with _game_graph_lock:
+            if _game_graph is None:
+                from game_graph import create_game_graph
+                _game_graph = create_game_graph(checkpointer=sqlite_checkpointer(game_db_path) if game_db_path else None)
+    return _game_graph
+
+def forget_game(thread_id):
+    """Drop a finished or abandoned game's checkpoints"""
+    if not thread_id:
+        return
+    game_graph = get_game_graph()
+    config = {"configurable": {"thread_id": thread_id}}
+    if game_graph.get_state(config).values.get("prefetched_hint"):
+        speculation.record(wasted=1)
+    checkpointer = game_graph.checkpointer
+    if hasattr(checkpointer, "delete_thread"):
+        checkpointer.delete_thread(thread_id)
+
+# Live games, keyed by the player's session cookie
+sessions = SessionStore(
+    GameSession,
+    max_sessions=int(os.getenv('MAX_SESSIONS', 10000)),
+    ttl=float(os.getenv('SESSION_TTL', 1800)),
+    # Persisted games outlive the in-memory cache entry
+    on_evict=None if game_db else lambda sid, session: forget_game(session.thread_id),
+    backing=game_db
+)
 
-# Game instance
-game_instance = None
+register_collector("sessions", sessions.stats)
+register_collector("speculation", speculation.stats)
+
+# Append-only record of starts, guesses, hints and outcomes (GAME_EVENT_LOG)
+event_log = event_log_from_env()
+if event_log:
+    register_collector("event_log", event_log.stats)
+
+def log_event(kind, **fields):
+    if event_log:
+        event_log.record(kind, **fields)
+
+def current_game(sid):
+    """Return (graph config, state values) of the session's current game, or (None, None)"""
+    session = sessions.get(sid)
+    if not session or not session.thread_id:
+        return None, None
+    config = {"configurable": {"thread_id": session.thread_id}}
+    return config, get_game_graph().get_state(config).values
+
+def play_turn(config, content):
+    """Run one turn of a game with the player's message"""
+    from langchain_core.messages import HumanMessage
+    # Only the new message is sent; the rest of the state lives in the thread
+    return get_game_graph().invoke({"messages": [HumanMessage(content=content)]}, config)
+
+def no_game():
+    return {
+        "message": "Please start a new game first!",
+        "status": "error"
+    }
+
+# Rendered once, then served as precompressed bytes with an ETag
+game_page = LazyPage(lambda: render_template_string(GAME_PAGE))
 
 @app.route('/')
 def home():
-    return render_template_string(GAME_PAGE)
+    # Assign the session now, so the WebSocket handshake carries its cookie
+    session_id()
+    return game_page.response()
+
+def begin_game(sid):
+    from langchain_core.messages import HumanMessage
+    from game_graph import init_game
+    
+    # Turns may call the model, so they are serialized per player (see guess_turn);
+    # the stripe lock, shared with other players, is only held to update the session
+    with sessions.turn_lock(sid):
+        with sessions.locked(sid, create=True) as session:
+            previous = session.thread_id
+            session.thread_id = new_session_id()
+            session.hint_ladder = None
+            session.hints_given = 0
+            sessions.save(sid, session)
+            config = {"configurable": {"thread_id": session.thread_id}}
+        forget_game(previous)
+        
+        state = init_game()
+        state["messages"].append(HumanMessage(content="Let's start the game!"))
+        result = get_game_graph().invoke(state, config)
+    
+    # Graded hints for the whole game, from one background call
+    thread_id = config["configurable"]["thread_id"]
+    build_ladder(result["current_word"], lambda ladder: store_ladder(sid, thread_id, ladder))
+    log_event("start", g=sid, w=result["current_word"])
+    return {
+        "message": result["messages"][-1].content,
+        "status": "success"
+    }
 
 @app.route('/start-game', methods=['POST'])
 def start_game():
-    global game_instance
-    state = init_game()
-    state["messages"].append(HumanMessage(content="Let's start the game!"))
-    game_instance = create_game_graph()
-    result = game_instance.invoke(state)
+    return jsonify(begin_game(session_id()))
+
+def store_ladder(sid, thread_id, ladder):
+    """Keep a generated hint ladder with the session, if it is still playing that game"""
+    with sessions.locked(sid) as session:
+        if session and session.thread_id == thread_id:
+            session.hint_ladder = ladder
+            sessions.save(sid, session)
+
+def guess_turn(sid, guess):
+    # One turn at a time per player: a guess over the WebSocket and one over HTTP
+    # would otherwise both advance the game's thread from the same state
+    with sessions.turn_lock(sid):
+        config, state = current_game(sid)
+        if not config or state.get("game_status") != "ongoing":
+            return no_game()
+        
+        # Once the hint ladder is ready hints come from it, so a prefetched hint would be wasted
+        session = sessions.get(sid)
+        config["configurable"]["speculate"] = not (session and session.hint_ladder)
+        result = play_turn(config, guess)
     
-    return jsonify({
-        "message": "I've picked a word! Start guessing!",
+    ended = result["game_status"] == "ended"
+    outcome = MISS if not ended else WIN if guess == result["current_word"] else LIMIT
+    log_event("guess", g=sid, w=result["current_word"], n=result["attempts"], r=outcome)
+    return {
+        "message": result["messages"][-1].content,
+        "attempts": result["attempts"],
+        "game_over": result["game_status"] == "ended",
         "status": "success"
-    })
+    }
 
 @app.route('/make-guess', methods=['POST'])
 def make_guess():
     guess = request.json.get('guess', '').lower().strip()
-    state = game_instance.get_state()
-    state["messages"].append(HumanMessage(content=guess))
-    result = game_instance.invoke(state)
+    return jsonify(guess_turn(session_id(), guess))
+
+def hint_turn(sid):
+    # Serialized with the player's guesses, so the hint is for the state they leave
+    with sessions.turn_lock(sid):
+        config, state = current_game(sid)
+        if not config or state.get("game_status") != "ongoing":
+            return no_game()
+        
+        # The next rung of the game's hint ladder, without a model call
+        with sessions.locked(sid) as session:
+            message = ladder_rung(session.hint_ladder, session.hints_given) if session else None
+            if message is not None:
+                session.hints_given += 1
+                sessions.save(sid, session)
+        source = "ladder"
+        
+        if message is None:
+            # The ladder isn't ready yet: use a hint prefetched for this attempt, else a local one
+            prefetched = state.get("prefetched_hint")
+            if prefetched and prefetched["attempt"] == state["attempts"]:
+                message = play_turn(config, "hint")["messages"][-1].content
+                source = "prefetched"
+            else:
+                # The first player message is the start of the game, not a guess
+                guesses = [m.content for m in state["messages"] if getattr(m, "type", None) == "human" and m.content != "hint"][1:]
+                message = local_hint(state["current_word"], guesses[-1].strip().lower() if guesses else "", state["attempts"])
+                source = "local"
     
-    return jsonify({
-        "message": result["messages"][-1].content,
-        "attempts": state["attempts"],
-        "game_over": state["game_status"] == "ended",
+    log_event("hint", g=sid, w=state["current_word"], n=state["attempts"], s=source)
+    return {
+        "message": message,
         "status": "success"
-    })
+    }
 
 @app.route('/get-hint', methods=['POST'])
 def get_hint():
-    state = game_instance.get_state()
-    state["messages"].append(HumanMessage(content="hint"))
-    result = game_instance.invoke(state)
-    
-    return jsonify({
-        "message": result["messages"][-1].content,
+    return jsonify(hint_turn(session_id()))
+
+@app.route('/speculation-stats', methods=['GET'])
+def speculation_stats():
+    """Expose speculative hint counts, wasted rate and saved latency"""
+    return jsonify(speculation.stats())
+
+def end_game(sid):
+    # Waits for a turn in progress, so its checkpoints aren't written after they are dropped
+    with sessions.turn_lock(sid):
+        config, state = current_game(sid)
+        session = sessions.discard(sid)
+        if config:
+            forget_game(session.thread_id)
+    if not config:
+        return {
+            "message": "Thanks for playing!",
+            "status": "success"
+        }
+    return {
+        "message": f"Thanks for playing! The word was '{state['current_word']}'",
         "status": "success"
-    })
+    }
 
 @app.route('/exit-game', methods=['POST'])
 def exit_game():
-    state = game_instance.get_state()
-    return jsonify({
-        "message": f"Thanks for playing! The word was '{state['current_word']}'",
-        "status": "success"
-    })
+    return jsonify(end_game(session_id()))
+
+# Persistent per-page channel for the same actions (see common/flask_ws.py)
+init_websocket(app, {
+    "start": lambda sid, frame, emit: begin_game(sid),
+    "guess": lambda sid, frame, emit: guess_turn(sid, str(frame.get('guess', '')).lower().strip()),
+    "hint": lambda sid, frame, emit: hint_turn(sid),
+    "exit": lambda sid, frame, emit: end_game(sid)
+})
 
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,194 @@
+"""
+The d2 game graph. Kept apart from the Flask app so LangChain and LangGraph
+are only imported when the first game starts.
+"""
+from typing import List, Optional, TypedDict, Annotated
+import time
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import StateGraph, END, START
+from langgraph.graph.message import add_messages
+from langgraph.checkpoint.memory import MemorySaver
+
+from common import llm as llm_backend
+from common.lexicon import load_lexicon
+from common.local_hints import local_hint
+from common.metrics import ERRORS, register_collector
+from common.resilience import Unavailable, guard_from_env
+from speculation import SPECULATIVE_HINTS, speculation
+
+MAX_ATTEMPTS = 10
+
+# Bounds hint calls, asked for or speculative (HINT_TIMEOUT, HINT_HEDGE_AFTER),
+# and stops calling a failing provider
+hint_guard = guard_from_env("HINT", failure_types=(llm_backend.ProviderError,))
+register_collector("hint_guard", hint_guard.stats)
+register_collector("hint_breaker", hint_guard.breaker.stats)
+
+# Define our state
+class GameState(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+    current_word: Optional[str]
+    attempts: int
+    game_status: str
+    prefetched_hint: Optional[dict]  # Speculative hint: {"hint", "attempt", "elapsed"}
+
+
+def create_game_graph(llm=None, checkpointer=None, speculative=None):
+    """
+    Build and compile the game graph. Each game runs as its own thread
+    (thread_id in the config) on the compiled graph; every invoke runs
+    one agent for the player's latest message and stops.
+
+    With speculative hints on, a wrong guess runs the hint agent in parallel
+    with the guess agent and parks its hint in the state, so the next
+    hint request is answered without calling the model. A turn run with
+    "speculate": False in its configurable (the app's hint ladder is ready,
+    so hints won't come from the graph) skips the prefetch.
+    """
+    # Initialize our LLM (live, record or replay, see common/llm.py); calls
+    # through the module are metered
+    llm = llm or llm_backend
+    speculative = SPECULATIVE_HINTS if speculative is None else speculative
+    
+    # Create the graph
+    workflow = StateGraph(GameState)
+    
+    # Define the nodes
+    def generate_word(state: GameState) -> dict:
+        """Generate a new word for the game"""
+        try:
+            word = llm.chat([
+                SystemMessage(content="You are a word generator for a word guessing game. Provide only a single word."),
+                HumanMessage(content="Generate a random common noun (object, animal, food, etc.) that would be fun to guess in a word game. Respond with just the word.")
+            ], max_tokens=10, temperature=0.9, priority=llm_backend.PRIORITY_WORD).strip().lower()
+        except Exception as e:
+            ERRORS.inc(1, "word_generation")
+            print(f"Error getting word from OpenAI: {str(e)}")
+            word = ""
+        if not word.isalpha():
+            word = load_lexicon().random_word()
+        return {
+            "current_word": word,
+            "messages": [AIMessage(content="I've picked a word! Start guessing!")]
+        }
+    
+    def process_guess(state: GameState) -> dict:
+        """Process the player's guess"""
+        guess = state["messages"][-1].content.strip().lower()
+        word = state["current_word"]
+        attempts = state["attempts"] + 1
+        if guess == word:
+            return {
+                "attempts": attempts,
+                "game_status": "ended",
+                "messages": [AIMessage(content=f"Congratulations! You've won! The word was '{word}'!")]
+            }
+        if attempts >= MAX_ATTEMPTS:
+            return {
+                "attempts": attempts,
+                "game_status": "ended",
+                "messages": [AIMessage(content=f"Game Over! You've reached {MAX_ATTEMPTS} attempts. The word was '{word}'.")]
+            }
+        feedback = llm.chat([
+            SystemMessage(content="You are the judge in a word guessing game. Never reveal or use the target word. Tell the player briefly whether their guess is close and nudge them in a new direction."),
+            HumanMessage(content=f"Target word: '{word}'. Player's guess: '{guess}'.")
+        ], temperature=0.7)
+        return {"attempts": attempts, "messages": [AIMessage(content=feedback)]}
+    
+    def player_guesses(state: GameState) -> List[str]:
+        return [m.content for m in state["messages"] if isinstance(m, HumanMessage) and m.content != "hint"]
+    
+    def hint_for(state: GameState) -> str:
+        """Ask the model for a hint, within the hint guard's timeout (raises Unavailable)"""
+        guesses = player_guesses(state)
+        messages = [
+            SystemMessage(content="You give hints in a word guessing game. Never reveal or use the target word. Give one short, helpful hint about its category, size, uses or characteristics."),
+            HumanMessage(content=f"Target word: '{state['current_word']}'. Guesses so far: {guesses[-5:]}.")
+        ]
+        return hint_guard.call(lambda: llm.chat(messages, temperature=0.7))
+    
+    def generate_hint(state: GameState) -> dict:
+        """Generate a hint for the player"""
+        try:
+            hint = hint_for(state)
+        except Unavailable:
+            ERRORS.inc(1, "hint_fallback")
+            # The first player message starts the game, it isn't a guess
+            guesses = player_guesses(state)[1:]
+            hint = local_hint(state["current_word"], guesses[-1].strip().lower() if guesses else "", state["attempts"])
+        return {"messages": [AIMessage(content=hint)]}
+    
+    def prefetch_hint(state: GameState) -> dict:
+        """Speculatively generate the next hint and park it in the state"""
+        if state.get("prefetched_hint"):
+            # The previous speculative hint was never asked for
+            speculation.record(wasted=1)
+        started = time.perf_counter()
+        try:
+            hint = hint_for(state)
+        except Exception as e:
+            # Runs alongside process_guess, so raising here would fail the player's guess
+            ERRORS.inc(1, "hint_prefetch")
+            print(f"Error prefetching hint: {str(e)}")
+            speculation.record(issued=1, wasted=1)
+            return {"prefetched_hint": None}
+        speculation.record(issued=1)
+        return {"prefetched_hint": {
+            "hint": hint,
+            "attempt": state["attempts"] + 1,
+            "elapsed": time.perf_counter() - started
+        }}
+    
+    def serve_hint(state: GameState) -> dict:
+        """Answer a hint request from the prefetched hint"""
+        prefetched = state["prefetched_hint"]
+        speculation.record(used=1, saved_latency=prefetched["elapsed"])
+        return {"messages": [AIMessage(content=prefetched["hint"])], "prefetched_hint": None}
+    
+    # Add nodes
+    workflow.add_node("generate_word", generate_word)
+    workflow.add_node("process_guess", process_guess)
+    workflow.add_node("generate_hint", generate_hint)
+    workflow.add_node("prefetch_hint", prefetch_hint)
+    workflow.add_node("serve_hint", serve_hint)
+    
+    # Define conditional routing: pick the agent(s) for the player's latest message
+    def router(state: GameState, config: RunnableConfig):
+        if state["game_status"] == "ended":
+            return END
+        if not state["current_word"]:
+            return "generate_word"
+        last = state["messages"][-1].content
+        if last == "hint":
+            prefetched = state.get("prefetched_hint")
+            if prefetched and prefetched["attempt"] == state["attempts"]:
+                return "serve_hint"
+            return "generate_hint"
+        # A wrong guess that doesn't end the game: evaluate it and prefetch the next hint in parallel
+        wrong = last.strip().lower() != state["current_word"] and state["attempts"] + 1 < MAX_ATTEMPTS
+        if speculative and wrong and config.get("configurable", {}).get("speculate", True):
+            return ["process_guess", "prefetch_hint"]
+        return "process_guess"
+    
+    # Add edges
+    workflow.add_conditional_edges(
+        START, router,
+        ["generate_word", "process_guess", "generate_hint", "prefetch_hint", "serve_hint", END]
+    )
+    for node in ("generate_word", "process_guess", "generate_hint", "prefetch_hint", "serve_hint"):
+        workflow.add_edge(node, END)
+    
+    # Compile the graph
+    return workflow.compile(checkpointer=checkpointer or MemorySaver())
+
+# Initialize the game
+def init_game() -> GameState:
+    return {
+        "messages": [],
+        "current_word": None,
+        "attempts": 0,
+        "game_status": "ongoing",
+        "prefetched_hint": None
+    }
+
@@ -0,0 +1,36 @@
+import os
+import threading
+
+# Run the hint agent alongside the guess agent after a wrong guess
+SPECULATIVE_HINTS = os.getenv('SPECULATIVE_HINTS', '0') == '1'
+
+class SpeculationStats:
+    """Counts speculative hints issued, used and wasted, and the latency saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.used = 0
+        self.wasted = 0
+        self.saved_latency = 0.0
+
+    def record(self, issued=0, used=0, wasted=0, saved_latency=0.0):
+        with self._lock:
+            self.issued += issued
+            self.used += used
+            self.wasted += wasted
+            self.saved_latency += saved_latency
+
+    def stats(self) -> dict:
+        with self._lock:
+            settled = self.used + self.wasted
+            return {
+                "enabled": SPECULATIVE_HINTS,
+                "issued": self.issued,
+                "used": self.used,
+                "wasted": self.wasted,
+                "wasted_rate": round(self.wasted / settled, 4) if settled else 0.0,
+                "saved_latency": round(self.saved_latency, 4)
+            }
+
+speculation = SpeculationStats()
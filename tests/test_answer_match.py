@@ -0,0 +1,64 @@
+"""
+Local answer matching: plurals, articles and typos of the target word are
+accepted; a different real word is not, however close its spelling.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.answer_match import AnswerMatcher, answer_matcher, is_correct, typos
+
+
+@pytest.mark.parametrize("word, guess", [
+    ("apple", "apple"),
+    ("apple", "Apples"),
+    ("apple", "an apple"),
+    ("apple", "the apples!"),
+    ("apple", "appel"),
+    ("apple", "aple"),
+    ("apple", "appple"),
+    ("horse", "hrose"),
+    ("horse", "horsse"),
+    ("cherry", "cherries"),
+    ("knife", "knives"),
+    ("balloon", "ballon"),
+])
+def test_accepts_the_word_and_its_typos(word, guess):
+    assert is_correct(word, guess)
+
+
+@pytest.mark.parametrize("word, guess", [
+    ("horse", "house"),
+    ("rice", "mice"),
+    ("cake", "lake"),
+    ("book", "hook"),
+    ("chair", "chain"),
+    ("horse", "hose"),
+    ("apple", "ample"),
+    ("cat", "act"),
+])
+def test_rejects_near_miss_words(word, guess):
+    assert not is_correct(word, guess)
+
+
+def test_short_words_must_be_exact():
+    assert is_correct("cat", "cats")
+    assert not is_correct("cat", "catt")
+
+
+def test_two_typos_only_with_tolerance_two():
+    assert AnswerMatcher("elephant", 1).matches("elephnat")
+    assert not AnswerMatcher("elephant", 1).matches("elpehnat")
+    assert AnswerMatcher("elephant", 2).matches("elpehnat")
+    assert not AnswerMatcher("elephant", 2).matches("elegant")
+
+
+def test_typos_are_swaps_doublings_and_singled_doubles():
+    assert typos("abba") == {"baba", "abab", "aabba", "abbba", "abbaa", "aba"}
+
+
+def test_matcher_is_cached_per_word():
+    assert answer_matcher("apple") is answer_matcher("apple")
@@ -0,0 +1,109 @@
+"""
+The d1 graph runs the chatbot exactly once per request: once to start the
+game, then once per guess, stopping before the player's turn each time.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+sys.path.insert(0, str(root_dir / "d1_chatbot"))
+
+pytest.importorskip("langgraph")
+
+# Model replies come from the (empty) replay cassette, so wrong guesses get local hints
+os.environ.setdefault("LLM_MODE", "replay")
+
+import graph_setup
+import nodes
+from agent_state import create_initial_state
+from graph_setup import HUMAN, create_game_graph
+from common.resilience import CircuitBreaker
+
+
+@pytest.fixture
+def counted_graph(monkeypatch):
+    calls = []
+    chatbot_node = graph_setup.chatbot_node
+
+    def counting_node(state, config=None):
+        calls.append(state["attempts"])
+        return chatbot_node(state, config)
+
+    monkeypatch.setattr(graph_setup, "chatbot_node", counting_node)
+    return create_game_graph(), calls
+
+
+def guess(graph, config, text):
+    graph.update_state(config, {"messages": [{"role": "user", "content": text}]}, as_node=HUMAN)
+    return graph.invoke(None, config)
+
+
+def test_start_runs_chatbot_once(counted_graph):
+    graph, calls = counted_graph
+    config = {"configurable": {"thread_id": "start"}}
+
+    result = graph.invoke(create_initial_state(), config)
+
+    assert len(calls) == 1
+    assert result["current_word"]
+    assert graph.get_state(config).next == (HUMAN,)
+
+
+@pytest.mark.parametrize("guesses", [1, 3, 7])
+def test_each_guess_runs_chatbot_once(counted_graph, guesses):
+    graph, calls = counted_graph
+    config = {"configurable": {"thread_id": f"guesses-{guesses}"}}
+    graph.invoke(create_initial_state(), config)
+
+    for attempt in range(1, guesses + 1):
+        result = guess(graph, config, "qqqq")
+        assert len(calls) == 1 + attempt
+        assert result["attempts"] == attempt
+        assert graph.get_state(config).next == (HUMAN,)
+
+
+def test_game_over_stops_the_graph(counted_graph):
+    graph, calls = counted_graph
+    config = {"configurable": {"thread_id": "give-up"}}
+    graph.invoke(create_initial_state(), config)
+
+    result = guess(graph, config, "i give up")
+
+    assert len(calls) == 2
+    assert not result["game_active"]
+    assert graph.get_state(config).next == ()
+
+
+def test_summary_holds_guesses_leaving_the_window(counted_graph):
+    graph, _ = counted_graph
+    config = {"configurable": {"thread_id": "summary"}}
+    graph.invoke(create_initial_state(), config)
+
+    guesses = [f"guess{letter}" for letter in "abcdefg"]
+    for text in guesses:
+        result = guess(graph, config, text)
+
+    # The oldest message in the window is folded in a turn early, as the next guess pushes it out
+    recent = [m["content"] for m in result["messages"] if m["role"] == "user"]
+    earlier = result["summary"].split(": ", 1)[1].split(", ")
+    assert recent == guesses[-3:]
+    assert earlier == guesses[:-2]
+
+
+def test_streamed_turn_emits_the_reply(counted_graph, monkeypatch):
+    graph, _ = counted_graph
+    # Earlier turns' replay misses may have opened the breaker
+    monkeypatch.setattr(nodes.reply_guard, "breaker", CircuitBreaker())
+    monkeypatch.setattr(nodes.llm, "stream", lambda messages, **params: iter(["It's ", "a fruit."]))
+    tokens = []
+    config = {"configurable": {"thread_id": "stream"}}
+    graph.invoke(create_initial_state(), config)
+
+    result = guess(graph, {"configurable": {**config["configurable"], "emit": tokens.append}}, "qqqq")
+
+    assert tokens == ["It's ", "a fruit."]
+    assert result["messages"][-1]["content"] == "It's a fruit."